@@ -22,11 +22,60 @@ Misha Schwartz, and Jaisie Sin
 This file contains the Block class, the main data structure used in the game.
 """
 from __future__ import annotations
-from typing import Optional, Tuple, List
+from typing import Any, Iterator, Optional, Tuple, List
 import random
 import math
+import itertools
 
-from settings import colour_name, COLOUR_LIST
+from settings import colour_name, COLOUR_INDEX, COLOUR_LIST
+
+# Hands out a distinct owner to every new board, see Block._owner
+_OWNERS = itertools.count()
+
+# A record of one change made to a Block, which Block.undo can reverse: the
+# Block that was changed, the name of the operation, and whatever is needed to
+# reverse it (the direction of a rotate or swap, the colour before a smash or
+# paint, or the children removed by a combine)
+UndoRecord = Tuple['Block', str, Any]
+
+# The index of the child in each quadrant, keyed by whether the quadrant is on
+# the right and whether it is on the bottom
+_QUADRANTS = {(True, False): 0, (False, False): 1, (False, True): 2,
+              (True, True): 3}
+# The (column, row) of the quadrant of each child, in halves of its parent
+_QUADRANT_OFFSETS = ((1, 0), (0, 0), (0, 1), (1, 1))
+# The indices of the two children along the top, right, bottom and left sides
+_SIDE_CHILDREN = ((0, 1), (0, 3), (2, 3), (1, 2))
+
+# Keeps Block hashes to 64 bits
+_MASK = (1 << 64) - 1
+# The odd multipliers used to mix the hashes of the four children of a Block
+_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB,
+                0xD6E8FEB86659FD93)
+# The random keys handed out by _zobrist_key so far
+_KEYS = {}
+
+
+def _zobrist_key(*parts: Any) -> int:
+    """Return the random 64-bit key for <parts>.
+
+    The key is derived from <parts> alone, so it is the same in every process.
+    """
+    if parts not in _KEYS:
+        _KEYS[parts] = random.Random(str(parts)).getrandbits(64)
+    return _KEYS[parts]
+
+
+def _mix(level: int, hashes: List[int]) -> int:
+    """Return the hash of a Block at <level> whose children, in order, have
+    the given <hashes>.
+    """
+    h = _zobrist_key('level', level)
+    for i in range(4):
+        h = ((h ^ hashes[i]) * _MULTIPLIERS[i]) & _MASK
+    h ^= h >> 29
+    h = (h * _MULTIPLIERS[0]) & _MASK
+    return h ^ (h >> 32)
 
 
 def generate_board(max_depth: int, size: int) -> Block:
@@ -79,6 +128,53 @@ class Block:
         stored in this order: upper-right child, upper-left child,
         lower-left child, lower-right child.
 
+    === Private Attributes ===
+    _children:
+        The children of this block, before _turns is applied to them.
+    _turns:
+        The number of clockwise quarter turns that have been applied to this
+        block by rotate, but not yet passed on to _children.
+    _stale:
+        True iff the positions of _children may be out of date.
+    _owner:
+        Identifies the board that may change this block in place. A block
+        whose owner differs from its parent's is shared with another board,
+        and is copied before anything in it is changed.
+    _parent:
+        The Block this block is a child of in the board that owns it, or None
+        if it is a root.
+    _hashes:
+        The hashes of this block's subtree when rotated by 0, 1, 2 and 3
+        clockwise quarter turns, or None if they have not been computed since
+        the subtree last changed.
+    _counts:
+        The number of blocks in this block's subtree that can be rotated and
+        swapped, smashed and combined, followed by the number of leaves at
+        max_depth and the number of those in each colour of COLOUR_LIST; or
+        None if they have not been computed since the subtree's blocks last
+        changed. Rotating and swapping do not change these counts.
+    _areas:
+        The number of unit cells in this block's subtree in each colour of
+        COLOUR_LIST, or None if they have not been computed since the colours
+        in the subtree last changed. Rotating and swapping do not change these
+        areas.
+    _edges:
+        For each side of this block (top, right, bottom and left), None or the
+        number of unit cells along that side in each colour of COLOUR_LIST; or
+        None if no side has been computed since the subtree last changed.
+
+    Rotating or swapping a block only records the change in _turns and
+    _stale. The change is passed on one level at a time, the next time the
+    children of a block are accessed, so that every traversal from the root
+    sees the correct children and positions without rotate and swap having to
+    visit the whole subtree.
+
+    The summaries returned by zobrist_hash, legal_count, colour_areas and
+    edge_counts are cached in every block. A change only discards the
+    summaries of the changed block and its ancestors (rotating a block just
+    reorders its own), so asking for them again after a move takes
+    O(max_depth) time.
+
     === Representation Invariants===
     - len(children) == 0 or len(children) == 4
     - If this Block has children:
@@ -86,7 +182,8 @@ class Block:
         - their size is half that of this Block.
         - their level is one greater than that of this Block.
         - their position is determined by the position and size of this Block,
-          and their index in this Block's list of children.
+          and their index in this Block's list of children, once <children>
+          has been accessed.
         - this Block's colour is None.
     - If this Block has no children:
         - its colour is not None.
@@ -97,7 +194,15 @@ class Block:
     colour: Optional[Tuple[int, int, int]]
     level: int
     max_depth: int
-    children: List[Block]
+    _children: List[Block]
+    _turns: int
+    _stale: bool
+    _owner: int
+    _parent: Optional[Block]
+    _hashes: Optional[Tuple[int, int, int, int]]
+    _counts: Optional[Tuple[int, ...]]
+    _areas: Optional[Tuple[int, ...]]
+    _edges: Optional[Tuple[Optional[Tuple[int, ...]], ...]]
 
     def __init__(self, position: Tuple[int, int], size: int,
                  colour: Optional[Tuple[int, int, int]], level: int,
@@ -116,7 +221,195 @@ class Block:
         self.colour = colour
         self.level = level
         self.max_depth = max_depth
-        self.children = []
+        self._children = []
+        self._turns = 0
+        self._stale = False
+        self._owner = next(_OWNERS)
+        self._parent = None
+        self._hashes = None
+        self._counts = None
+        self._areas = None
+        self._edges = None
+
+    @property
+    def children(self) -> List[Block]:
+        """The children of this Block, with any pending rotations and
+        position changes applied.
+        """
+        if self._turns or self._stale:
+            self._resolve()
+        return self._children
+
+    @children.setter
+    def children(self, children: List[Block]) -> None:
+        """Replace the children of this Block with <children>, which must
+        already have positions consistent with this Block's.
+        """
+        self._children = children
+        self._turns = 0
+        self._stale = False
+        for child in children:
+            child._adopt(self._owner)
+            child._parent = self
+        self._invalidate()
+
+    def _adopt(self, owner: int) -> None:
+        """Make <owner> the owner of this Block and of every descendant that
+        does not already belong to <owner>.
+        """
+        if self._owner != owner:
+            self._owner = owner
+            for child in self._children:
+                child._adopt(owner)
+
+    def _clone(self, owner: int, parent: Optional[Block]) -> Block:
+        """Return a copy of this Block that belongs to <owner>, is a child of
+        <parent>, and shares this Block's children.
+
+        Pending rotations and position changes are passed on to the children
+        first. Otherwise both blocks would later pass the same changes on to
+        the children they share.
+        """
+        if self._turns or self._stale:
+            self._resolve()
+        block = Block(self.position, self.size, self.colour, self.level,
+                      self.max_depth)
+        block._children = list(self._children)
+        block._owner = owner
+        block._parent = parent
+        block._hashes = self._hashes
+        block._counts = self._counts
+        block._areas = self._areas
+        block._edges = self._edges
+        return block
+
+    def _invalidate(self, contents: bool = True) -> None:
+        """Forget the cached summaries of this Block and all its ancestors,
+        because this Block's subtree has changed.
+
+        If <contents> is False, the subtree has only been rearranged by
+        rotating or swapping, so the summaries that do not depend on the
+        arrangement are kept.
+        """
+        block = self
+        while block is not None and (
+                block._hashes is not None or block._edges is not None or
+                contents and (block._counts is not None or
+                              block._areas is not None)):
+            block._hashes = None
+            block._edges = None
+            if contents:
+                block._counts = None
+                block._areas = None
+            block = block._parent
+
+    def _turn_caches(self, turns: int) -> None:
+        """Update the cached summaries of this Block for its subtree having
+        been rotated by <turns> clockwise quarter turns.
+        """
+        if self._hashes is not None:
+            self._hashes = tuple(self._hashes[(i + turns) % 4]
+                                 for i in range(4))
+        if self._edges is not None:
+            # Turning clockwise moves each side to the next one clockwise
+            self._edges = tuple(self._edges[(side - turns) % 4]
+                                for side in range(4))
+
+    def zobrist_hash(self) -> int:
+        """Return a 64-bit hash of this Block and all its descendants.
+
+        Blocks that are equal (==) have equal hashes. The hash is built from
+        random keys for each level and colour, mixed bottom-up.
+        """
+        return self._hash_vector()[0]
+
+    def _hash_vector(self) -> Tuple[int, int, int, int]:
+        """Return the hashes of this Block's subtree when rotated by 0, 1, 2
+        and 3 clockwise quarter turns, computing them if necessary.
+        """
+        if self._hashes is None:
+            if not self.children:
+                key = _zobrist_key(self.level, self.max_depth, self.colour)
+                self._hashes = (key, key, key, key)
+            else:
+                vectors = [child._hash_vector() for child in self.children]
+                # Rotating this block by t moves child (i + t) % 4 to
+                # position i, and rotates that child by t as well
+                self._hashes = tuple(
+                    _mix(self.level, [vectors[(i + t) % 4][t]
+                                      for i in range(4)])
+                    for t in range(4))
+        return self._hashes
+
+    def colour_areas(self) -> Tuple[int, ...]:
+        """Return the number of unit cells in this Block in each colour of
+        COLOUR_LIST, in the same order.
+        """
+        if self._areas is None:
+            areas = [0] * len(COLOUR_LIST)
+            if self._children:
+                # The order of the children does not matter
+                for child in self._children:
+                    for i, area in enumerate(child.colour_areas()):
+                        areas[i] += area
+            elif self.colour in COLOUR_INDEX:
+                areas[COLOUR_INDEX[self.colour]] = \
+                    4 ** (self.max_depth - self.level)
+            self._areas = tuple(areas)
+        return self._areas
+
+    def edge_counts(self, side: int) -> Tuple[int, ...]:
+        """Return the number of unit cells along <side> of this Block in each
+        colour of COLOUR_LIST, in the same order. <side> is 0, 1, 2 or 3 for
+        the top, right, bottom and left side.
+
+        Only the blocks touching <side> are visited.
+        """
+        edges = self._edges
+        if edges is not None and edges[side] is not None:
+            return edges[side]
+        if not self.children:
+            counts = [0] * len(COLOUR_LIST)
+            if self.colour in COLOUR_INDEX:
+                counts[COLOUR_INDEX[self.colour]] = \
+                    2 ** (self.max_depth - self.level)
+        else:
+            first, second = _SIDE_CHILDREN[side]
+            counts = [a + b for a, b in
+                      zip(self.children[first].edge_counts(side),
+                          self.children[second].edge_counts(side))]
+        edges = list(self._edges or (None, None, None, None))
+        edges[side] = tuple(counts)
+        self._edges = tuple(edges)
+        return edges[side]
+
+    def _resolve(self) -> None:
+        """Pass this Block's pending rotation and position changes on to its
+        children.
+
+        This only updates the children themselves; their own children are
+        brought up to date when they are next accessed.
+        """
+        turns = self._turns
+        if turns and self._children:
+            self._children = [self._children[(i + turns) % 4]
+                              for i in range(4)]
+        positions = self._children_positions()
+        for i, child in enumerate(self._children):
+            if child.position == positions[i] and \
+                    not (turns and child._children):
+                continue
+            if child._owner != self._owner:
+                # <child> is shared with another board, so change a copy
+                child = child._clone(self._owner, self)
+                self._children[i] = child
+            child.position = positions[i]
+            if child._children:
+                child._turns = (child._turns + turns) % 4
+                child._turn_caches(turns)
+                child._stale = True
+        self._turns = 0
+        self._stale = False
 
     def __str__(self) -> str:
         """Return this Block in a string format.
@@ -188,25 +481,12 @@ class Block:
         descendants to have positions consistent with this Block's.
 
         <position> is the (x, y) coordinates of the upper-left corner of this
-        Block.
+        Block. The descendants are updated lazily, the next time their parent's
+        children are accessed.
         """
-        # TODO: Implement me
-
-        children_positions = []
-        if self.children:  # apparently equivalent to: if self.children != []
-            children_positions = self._children_positions()
-        old_position = self.position[0], self.position[1]
-        x = position[0] - old_position[0]
-        y = position[1] - old_position[1]
         self.position = position
-        if self.children:
-            for i in range(len(children_positions)):
-                old_cords = children_positions[i]
-                new_x = old_cords[0] + x
-                new_y = old_cords[1] + y
-                self.children[i].position = (new_x, new_y)
-                self.children[i].\
-                    _update_children_positions(self.children[i].position)
+        if self._children:
+            self._stale = True
 
     def smashable(self) -> bool:
         """Return True iff this block can be smashed.
@@ -216,28 +496,100 @@ class Block:
         """
         return self.level != self.max_depth and len(self.children) == 0
 
-    def smash(self) -> bool:
+    def combinable(self) -> bool:
+        """Return True iff this block can be combined.
+
+        A block can be combined if it is at level max_depth - 1, has children,
+        and a strict majority of its children have the same colour.
+        """
+        if self.level != self.max_depth - 1 or not self._children:
+            return False
+        # The children are unit cells, so the areas count their colours
+        areas = self.colour_areas()
+        return areas.count(max(areas)) == 1
+
+    def paintable(self, colour: Tuple[int, int, int]) -> bool:
+        """Return True iff this block can be painted <colour>.
+
+        A block can be painted if it is a leaf at max_depth whose colour is not
+        already <colour>.
+        """
+        return self.level == self.max_depth and self.colour is not None and \
+            self.colour != colour
+
+    def legal_count(self, action: Tuple[str, Optional[int]],
+                    colour: Tuple[int, int, int]) -> int:
+        """Return the number of blocks in this Block's subtree (including this
+        Block) on which <action> can be performed, painting with <colour>.
+
+        <action> is one of the actions in actions.py. Passing is not performed
+        on a block, so its count is 0.
+        """
+        counts = self._legal_counts()
+        name = action[0]
+        if name in ('rotate', 'swap'):
+            return counts[0]
+        elif name == 'smash':
+            return counts[1]
+        elif name == 'combine':
+            return counts[2]
+        elif name == 'paint':
+            if colour in COLOUR_INDEX:
+                return counts[3] - counts[4 + COLOUR_INDEX[colour]]
+            return counts[3]
+        return 0
+
+    def _legal_counts(self) -> Tuple[int, ...]:
+        """Return the counts described by _counts, computing them if
+        necessary.
+        """
+        if self._counts is None:
+            counts = [0] * (4 + len(COLOUR_LIST))
+            if self._children:
+                # The order of the children does not matter, so there is no
+                # need to pass on pending rotations first
+                for child in self._children:
+                    for i, count in enumerate(child._legal_counts()):
+                        counts[i] += count
+                counts[0] += 1
+                counts[2] += int(self.combinable())
+            elif self.level < self.max_depth:
+                counts[1] = 1
+            else:
+                counts[3] = 1
+                if self.colour in COLOUR_INDEX:
+                    counts[4 + COLOUR_INDEX[self.colour]] = 1
+            self._counts = tuple(counts)
+        return self._counts
+
+    def smash(self, log: Optional[List[UndoRecord]] = None) -> bool:
         """Sub-divide this block so that it has four randomly generated
         children.
 
         If this Block's level is <max_depth>, do nothing. If this block has
         children, do nothing.
 
-        Return True iff the smash was performed.
+        Return True iff the smash was performed. If it was and <log> is given,
+        append an undo record for the smash to <log>.
         """
         # TODO: Implement me
         if not self.smashable():
             return False
         else:
+            if log is not None:
+                log.append((self, 'smash', self.colour))
+            self._invalidate()
             self.colour = None
             children_positions = self._children_positions()
             for subblock in range(4):
                 # randomly assign colours to four blocks
                 n = random.randint(0, len(COLOUR_LIST) - 1)
-                self.children.append(Block(children_positions[subblock],
-                                           self._child_size(),
-                                           COLOUR_LIST[n], self.level + 1,
-                                           self.max_depth))
+                child = Block(children_positions[subblock],
+                              self._child_size(), COLOUR_LIST[n],
+                              self.level + 1, self.max_depth)
+                child._owner = self._owner
+                child._parent = self
+                self.children.append(child)
             for subblock in self.children:
                 # decide if we smash again
                 number = random.random()
@@ -246,106 +598,80 @@ class Block:
                     subblock.smash()
             return True
 
-    def swap(self, direction: int) -> bool:
+    def swap(self, direction: int,
+             log: Optional[List[UndoRecord]] = None) -> bool:
         """Swap the child Blocks of this Block.
 
         If this Block has no children, do nothing. Otherwise, if <direction> is
         1, swap vertically. If <direction> is 0, swap horizontally.
 
-        Return True iff the swap was performed.
+        Return True iff the swap was performed. If it was and <log> is given,
+        append an undo record for the swap to <log>.
 
         Precondition: <direction> is either 0 or 1
         """
-        # TODO: Implement me
         if not self.children:
             return False
         elif direction == 0:
-            children_positions = self._children_positions()
-            lst = []
-            self.children[0]._update_children_positions(children_positions[1])
-            self.children[1]._update_children_positions(children_positions[0])
-            self.children[2]._update_children_positions(children_positions[3])
-            self.children[3]._update_children_positions(children_positions[2])
-            lst.append(self.children[1])
-            lst.append(self.children[0])
-            lst.append(self.children[3])
-            lst.append(self.children[2])
-            self.children = lst
-            return True
+            lst = [self._children[1], self._children[0], self._children[3],
+                   self._children[2]]
         else:
-            children_positions = self._children_positions()
-            lst = []
-            self.children[0]._update_children_positions(children_positions[3])
-            self.children[1]._update_children_positions(children_positions[2])
-            self.children[2]._update_children_positions(children_positions[1])
-            self.children[3]._update_children_positions(children_positions[0])
-            lst.append(self.children[3])
-            lst.append(self.children[2])
-            lst.append(self.children[1])
-            lst.append(self.children[0])
-            self.children = lst
-            return True
-
-    def rotate(self, direction: int) -> bool:
+            lst = [self._children[3], self._children[2], self._children[1],
+                   self._children[0]]
+        # The children's positions are updated the next time they're accessed
+        self._children = lst
+        self._stale = True
+        self._invalidate(False)
+        if log is not None:
+            log.append((self, 'swap', direction))
+        return True
+
+    def rotate(self, direction: int,
+               log: Optional[List[UndoRecord]] = None) -> bool:
         """Rotate this Block and all its descendants.
 
         If this Block has no children, do nothing. If <direction> is 1, rotate
         clockwise. If <direction> is 3, rotate counter-clockwise.
 
-        Return True iff the rotate was performed.
+        Return True iff the rotate was performed. If it was and <log> is given,
+        append an undo record for the rotate to <log>.
+
+        The rotation is recorded in this Block and only passed on to its
+        descendants when they are accessed, so this takes constant time.
 
         Precondition: <direction> is either 1 or 3.
         """
-        # TODO: Implement me
-        if self.colour is not None:
+        if self.colour is not None or not self._children:
             return False
-        elif direction == 1:
-            children_positions = self._children_positions()
-            lst = []
-            self.children[0]._update_children_positions(children_positions[3])
-            self.children[1]._update_children_positions(children_positions[0])
-            self.children[2]._update_children_positions(children_positions[1])
-            self.children[3]._update_children_positions(children_positions[2])
-            lst.append(self.children[1])
-            lst.append(self.children[2])
-            lst.append(self.children[3])
-            lst.append(self.children[0])
-            self.children = lst
-            for child in self.children:
-                child.rotate(direction)
-            return True
-        else:
-            children_positions = self._children_positions()
-            lst = []
-            self.children[0]._update_children_positions(children_positions[1])
-            self.children[1]._update_children_positions(children_positions[2])
-            self.children[2]._update_children_positions(children_positions[3])
-            self.children[3]._update_children_positions(children_positions[0])
-            lst.append(self.children[3])
-            lst.append(self.children[0])
-            lst.append(self.children[1])
-            lst.append(self.children[2])
-            self.children = lst
-            for child in self.children:
-                child.rotate(direction)
-            return True
-
-    def paint(self, colour: Tuple[int, int, int]) -> bool:
+        turns = 1 if direction == 1 else 3
+        self._turns = (self._turns + turns) % 4
+        self._turn_caches(turns)
+        if self._parent is not None:
+            self._parent._invalidate(False)
+        if log is not None:
+            log.append((self, 'rotate', direction))
+        return True
+
+    def paint(self, colour: Tuple[int, int, int],
+              log: Optional[List[UndoRecord]] = None) -> bool:
         """Change this Block's colour iff it is a leaf at a level of max_depth
         and its colour is different from <colour>.
 
-        Return True iff this Block's colour was changed.
+        Return True iff this Block's colour was changed. If it was and <log> is
+        given, append an undo record for the paint to <log>.
         """
         # TODO: Implement me
         if self.colour is None:
             return False
         elif self.level == self.max_depth and self.colour != colour:
+            if log is not None:
+                log.append((self, 'paint', self.colour))
+            self._invalidate()
             self.colour = colour
             return True
         return False
-        
 
-    def combine(self) -> bool:
+    def combine(self, log: Optional[List[UndoRecord]] = None) -> bool:
         """Turn this Block into a leaf based on the majority colour of its
         children.
 
@@ -356,56 +682,239 @@ class Block:
         If there is no majority colour, do nothing. If this block is not at a
         level of max_depth - 1, or this block has no children, do nothing.
 
-        Return True iff this Block was turned into a leaf node.
+        Return True iff this Block was turned into a leaf node. If it was and
+        <log> is given, append an undo record for the combine to <log>.
         """
         # TODO: Implement me
-        if self.level != self.max_depth - 1 or self.colour is not None:
+        if not self.combinable():
+            # if two colours have the maximum, do nothing
             return False
         else:
-            colour_dictionary = {}
-            # create a colour dict with values of how many squares in that block
-            # have that colour
-            for child in self.children:
-                if child.colour not in colour_dictionary:
-                    colour_dictionary[child.colour] = 0
-                colour_dictionary[child.colour] += 1
-            maximum = 0
-            count = 0
-            new_colour = None
-            for key in colour_dictionary:
-                if colour_dictionary[key] > maximum:
-                    new_colour = key
-                    maximum = colour_dictionary[key]
-            for key in colour_dictionary:
-                if colour_dictionary[key] == maximum:
-                    count = count + 1
-            if count > 1:
-                # if two colours have the maximum, do nothing
-                return False
-            else:
-                # if one colour has maximum, cover entire block with that colour
-                self.children = []
-                self.colour = new_colour
-                return True
+            # if one colour has maximum, cover entire block with that colour
+            areas = self.colour_areas()
+            new_colour = COLOUR_LIST[areas.index(max(areas))]
+            if log is not None:
+                log.append((self, 'combine', self.children))
+            self.children = []
+            self.colour = new_colour
+            return True
 
     def create_copy(self) -> Block:
         """Return a new Block that is a deep copy of this Block.
 
         Remember that a deep copy has new blocks (not aliases) at every level.
         """
-        # TODO: Implement me
+        return self._copy(next(_OWNERS), None)
+
+    def _copy(self, owner: int, parent: Optional[Block]) -> Block:
+        """Return a deep copy of this Block that belongs to <owner> and is a
+        child of <parent>.
+        """
+        new_block = Block(self.position, self.size, self.colour, self.level,
+                          self.max_depth)
+        new_block._owner = owner
+        new_block._parent = parent
+        new_block._children = [child._copy(owner, new_block)
+                               for child in self.children]
+        new_block._hashes = self._hashes
+        new_block._counts = self._counts
+        new_block._areas = self._areas
+        new_block._edges = self._edges
+        return new_block
+
+    def descendant(self, path: List[int]) -> Block:
+        """Return the descendant of this Block that is reached by following
+        the child indices in <path>, in order.
+
+        Precondition: every index in <path> refers to an existing child.
+        """
+        block = self
+        for i in path:
+            block = block.children[i]
+        return block
+
+    def locate_path(self, location: Tuple[int, int],
+                    level: int) -> Optional[List[int]]:
+        """Return the child indices that lead from this Block to the block
+        at <level> that includes <location>. <location> is a coordinate-pair
+        (x, y).
+
+        A block includes all locations that are strictly inside of it, as well
+        as locations on the top and left edges. A block does not include
+        locations that are on the bottom or right edge.
+
+        If <level> is greater than the level of the deepest block that includes
+        <location>, return the path to that deepest block. If this Block does
+        not include <location>, return None.
+
+        Each child index is computed from <location> and the pending rotations
+        of the blocks on the way, without updating any block, so this takes
+        O(max_depth) time.
+        """
+        x, y = self.position
+        if not (x <= location[0] < x + self.size and
+                y <= location[1] < y + self.size):
+            return None
+
+        path = []
+        block = self
+        turns = 0
+        while block.level < level and block._children:
+            # The rotations that have not yet been applied to block._children
+            turns = (turns + block._turns) % 4
+            half = block._child_size()
+            right = location[0] >= x + half
+            bottom = location[1] >= y + half
+            if right:
+                x += half
+            if bottom:
+                y += half
+            i = _QUADRANTS[(right, bottom)]
+            path.append(i)
+            block = block._children[(i + turns) % 4]
+        return path
+
+    def locate(self, location: Tuple[int, int],
+               level: int) -> Optional[Block]:
+        """Return the block within this Block that is at <level> and includes
+        <location>, as described in locate_path.
+
+        Return None if this Block does not include <location>.
+        """
+        path = self.locate_path(location, level)
+        if path is None:
+            return None
+        return self.descendant(path)
+
+    def leaf_cells(self) -> \
+            Iterator[Tuple[int, int, int, Tuple[int, int, int]]]:
+        """Yield a tuple (column, row, width, colour) for every leaf in this
+        Block's subtree.
+
+        Positions and sizes are in unit cells, i.e. blocks at max_depth:
+        (column, row) is the upper left unit cell of the leaf, counting from
+        the upper left of this Block, and the leaf is <width> by <width> unit
+        cells.
+
+        Pending rotations are applied on the fly rather than passed on to the
+        children, so this does not change or copy any block.
+        """
+        # Each entry is a block, its position, and the rotations that have not
+        # yet been passed on to it
+        stack = [(self, 0, 0, 0)]
+        while stack:
+            block, column, row, turns = stack.pop()
+            width = 2 ** (block.max_depth - block.level)
+            if not block._children:
+                yield column, row, width, block.colour
+            else:
+                turns = (turns + block._turns) % 4
+                half = width // 2
+                for i in range(4):
+                    dx, dy = _QUADRANT_OFFSETS[i]
+                    stack.append((block._children[(i + turns) % 4],
+                                  column + dx * half, row + dy * half, turns))
+
+    def unshare(self, path: List[int]) -> Block:
+        """Return the descendant of this Block at <path>, first copying any
+        block on <path> that is shared with another board.
+
+        The returned Block can then be changed in place without affecting any
+        other board.
+
+        Precondition: every index in <path> refers to an existing child.
+        """
+        block = self
+        for i in path:
+            child = block.children[i]
+            if child._owner != block._owner:
+                child = child._clone(block._owner, block)
+                block._children[i] = child
+            block = child
+        return block
+
+    def branch(self, path: List[int]) -> Tuple[Block, Block]:
+        """Return a new board that is equivalent to this Block, and the block
+        at <path> in the new board.
+
+        Only the blocks on <path> are copied; every other subtree is shared
+        with this Block, so this takes O(len(path)) time and space. The
+        returned block (and, through unshare, any other block of the new
+        board) can be changed without affecting this Block. Changing this
+        Block in place while the new board is in use, however, may also change
+        the new board.
+
+        Precondition: every index in <path> refers to an existing child.
+        """
+        root = self._clone(next(_OWNERS), None)
+        return root, root.unshare(path)
+
+    def apply_action(self, action: Tuple[str, Optional[int]],
+                     colour: Tuple[int, int, int],
+                     log: Optional[List[UndoRecord]] = None) -> bool:
+        """Perform <action> on this Block, painting it <colour> if <action> is
+        a paint.
+
+        <action> is one of the actions in actions.py, such as ('rotate', 1).
+        Passing always succeeds and changes nothing.
 
-        if self.colour is not None:
-            return Block(self.position, self.size, self.colour, self.level,
-                         self.max_depth)
+        Return True iff the action was performed. If it was and <log> is given,
+        append an undo record for it to <log> (passing records nothing).
+        """
+        name, direction = action
+        if name == 'rotate':
+            return self.rotate(direction, log)
+        elif name == 'swap':
+            return self.swap(direction, log)
+        elif name == 'smash':
+            return self.smash(log)
+        elif name == 'combine':
+            return self.combine(log)
+        elif name == 'paint':
+            return self.paint(colour, log)
+        return name == 'pass'
+
+    @staticmethod
+    def undo(record: UndoRecord) -> None:
+        """Reverse the change described by <record>. The record names the
+        Block that was changed, so this can be called as board.undo(record).
+
+        Records must be undone in the reverse of the order they were made in,
+        so that each one is undone on exactly the state its change produced.
+        """
+        block, name, saved = record
+        # Rotations of the blocks above <block> may not have been passed on
+        # to it yet, so pass them on first, so that <block> is changed in the
+        # orientation it was in when <record> was made
+        ancestors = []
+        parent = block._parent
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parent._parent
+        for ancestor in reversed(ancestors):
+            if ancestor._turns or ancestor._stale:
+                ancestor._resolve()
+
+        if name == 'rotate':
+            block.rotate(4 - saved)
+        elif name == 'swap':
+            block.swap(saved)
+        elif name == 'combine':
+            # The old children still have the owner and parent they had
+            # before the combine. Some of them may be shared with another
+            # board, so they are put back as they are, not adopted.
+            block.colour = None
+            block._children = saved
+            block._turns = 0
+            # <block> may have moved since it was combined, so the positions
+            # of its old children are updated the next time they're accessed
+            block._stale = True
+            block._invalidate()
         else:
-            children = []
-            for i in range(len(self.children)):
-                children.append(self.children[i].create_copy())
-            new_block = Block(self.position, self.size, self.colour, self.level,
-                              self.max_depth)
-            new_block.children = children
-            return new_block
+            # Smashes and paints saved the colour block had before
+            block.children = []
+            block.colour = saved
+            block._invalidate()
 
 
 if __name__ == '__main__':
@@ -413,7 +922,7 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
-            'settings'
+            'itertools', 'settings'
         ],
         'max-attributes': 15,
         'max-args': 6
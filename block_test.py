@@ -0,0 +1,180 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for block.py, in particular for the lazily updated,
+shared and cached parts of Block: branching, undo and the cached summaries.
+"""
+import random
+from typing import Tuple
+
+import pytest
+
+from actions import ROTATE_CLOCKWISE, SWAP_HORIZONTAL, SMASH, COMBINE, PAINT
+from block import Block, generate_board
+from board_helpers import block_paths, random_path, rebuilt
+from moves import BLOCK_ACTIONS
+from settings import COLOUR_LIST
+
+
+def _rearranged_board(seed: int) -> Tuple[Block, random.Random]:
+    """Return a random board whose blocks have been rotated and swapped, many
+    of them still with pending rotations, and the generator used to make it.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    board = generate_board(rng.randint(2, 5), 750)
+    for _ in range(6):
+        block = board.descendant(random_path(board, rng, 0.4))
+        if rng.random() < 0.6:
+            block.rotate(rng.choice((1, 3)))
+        else:
+            block.swap(rng.randrange(2))
+    return board, rng
+
+
+def _assert_caches_fresh(board: Block) -> None:
+    """Assert that every cached summary of <board> is the same as one
+    computed from scratch.
+    """
+    fresh = rebuilt(board)
+    assert board.zobrist_hash() == fresh.zobrist_hash()
+    assert board.colour_areas() == fresh.colour_areas()
+    for side in range(4):
+        assert board.edge_counts(side) == fresh.edge_counts(side)
+    for action in (ROTATE_CLOCKWISE, SWAP_HORIZONTAL, SMASH, COMBINE, PAINT):
+        for colour in COLOUR_LIST:
+            assert board.legal_count(action, colour) == \
+                fresh.legal_count(action, colour)
+
+
+def _random_moves(board: Block, rng: random.Random, num_moves: int) -> None:
+    """Try <num_moves> random actions with random colours on random blocks of
+    <board>.
+    """
+    for _ in range(num_moves):
+        block = board.descendant(random_path(board, rng))
+        block.apply_action(rng.choice(BLOCK_ACTIONS), rng.choice(COLOUR_LIST))
+
+
+def test_branch_matches_copy(seed: int) -> None:
+    """Test that a branch is the same board as a deep copy, and that changing
+    it the same way as the copy gives the same board again, without changing
+    the original.
+    """
+    board, rng = _rearranged_board(seed)
+    expected = board.create_copy()
+    path = random_path(board, rng)
+
+    trial, block = board.branch(path)
+    copy = board.create_copy()
+    assert trial == copy
+    assert block == copy.descendant(path)
+
+    # Smashing is random, so both boards smash with the same random numbers
+    action = rng.choice(BLOCK_ACTIONS)
+    colour = rng.choice(COLOUR_LIST)
+    random.seed(seed)
+    done = block.apply_action(action, colour)
+    random.seed(seed)
+    assert copy.descendant(path).apply_action(action, colour) == done
+    assert trial == copy
+    assert board == expected
+
+
+def test_undo_restores_board(seed: int) -> None:
+    """Test that undoing random moves made on a branch, in reverse order,
+    restores the branch and leaves the original board unchanged.
+    """
+    board, rng = _rearranged_board(seed)
+    expected = board.create_copy()
+
+    trial, _ = board.branch(random_path(board, rng))
+    log = []
+    for _ in range(10):
+        block = trial.unshare(random_path(trial, rng))
+        block.apply_action(rng.choice(BLOCK_ACTIONS), rng.choice(COLOUR_LIST),
+                           log)
+    assert board == expected
+    for record in reversed(log):
+        trial.undo(record)
+    assert trial == expected
+    assert board == expected
+    _assert_caches_fresh(trial)
+    _assert_caches_fresh(board)
+
+
+def test_caches_after_random_moves(seed: int) -> None:
+    """Test that the cached hash, colour areas, edge counts and legal move
+    counts of a board are the same as fresh ones after random moves.
+    """
+    board, rng = _rearranged_board(seed)
+    _assert_caches_fresh(board)
+    for _ in range(5):
+        _random_moves(board, rng, 4)
+        _assert_caches_fresh(board)
+
+
+def test_branch_after_reading_original(seed: int) -> None:
+    """Test that reading the original board after branching it does not
+    change the branch.
+    """
+    board, rng = _rearranged_board(seed)
+    expected = _rearranged_board(seed)[0].create_copy()
+    path = random_path(expected, rng)
+
+    trial, _ = board.branch(path)
+    str(board)
+    assert str(trial) == str(expected)
+    assert trial == expected
+    assert board == expected
+
+
+def test_undo_combine_in_branch(seed: int) -> None:
+    """Test that undoing a combine in a branch leaves the original board in
+    charge of its own blocks, so that changing them there still updates its
+    cached summaries.
+    """
+    random.seed(seed)
+    board = generate_board(3, 750)
+    combinable = [path for path in block_paths(board)
+                  if board.descendant(path).combinable()]
+    if not combinable:
+        return
+    path = combinable[0]
+    expected = board.create_copy()
+
+    trial, block = board.branch(path)
+    log = []
+    assert block.combine(log)
+    trial.undo(log.pop())
+    assert trial == expected
+    assert board == expected
+
+    leaf = board.descendant(path + [0])
+    colour = COLOUR_LIST[(COLOUR_LIST.index(leaf.colour) + 1) %
+                         len(COLOUR_LIST)]
+    assert leaf.paint(colour)
+    _assert_caches_fresh(board)
+
+
+if __name__ == '__main__':
+    pytest.main(['block_test.py'])
@@ -23,13 +23,15 @@ This file contains the different game states for the Blocky game.
 """
 
 from __future__ import annotations
+import threading
 from typing import Dict, List, Optional, Tuple
 import pygame
 
 from actions import ACTION_MESSAGE, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
 from block import Block
-from player import Player
+from goal import Goal, score_goals
+from player import HumanPlayer, Player
 from renderer import Renderer
 from settings import ANIMATION_DURATION
 
@@ -79,12 +81,23 @@ class GameData:
     === Representation Invariants ===
     - len(players) >= 1
     """
+    # === Private Attributes ===
+    # _goals:
+    #   A copy of each player's goal, in the same order as players. Scores are
+    #   computed with these, so that they never share a goal's cached state
+    #   with a player choosing a move in another thread.
+    # _scores:
+    #   The hash of the board the players' goal scores were last computed for,
+    #   and those scores keyed by player ID; or None if they have not been
+    #   computed yet.
     max_turns: int
     board: Block
     players: List[Player]
     smashes: Dict[int, int]
     combines: Dict[int, int]
     paints: Dict[int, int]
+    _goals: List[Goal]
+    _scores: Optional[Tuple[int, Dict[int, int]]]
 
     def __init__(self, board: Block, players: List[Player]) -> None:
         """Initialize the game data, saving a reference to <board> and
@@ -107,12 +120,31 @@ class GameData:
             self.combines[player.id] = 0
             self.paints[player.id] = 0
 
+        self._goals = [type(player.goal)(player.goal.colour)
+                       for player in players]
+        self._scores = None
+
+    def goal_scores(self) -> Dict[int, int]:
+        """Return every player's score based on their goal, keyed by player
+        ID.
+
+        All the goals are scored together, and the scores are kept until the
+        board changes, so asking for several players' scores on the same board
+        only scores it once.
+        """
+        key = self.board.zobrist_hash()
+        if self._scores is None or self._scores[0] != key:
+            scores = score_goals(self._goals, self.board)
+            self._scores = (key, {player.id: score for player, score
+                                  in zip(self.players, scores)})
+        return self._scores[1]
+
     def calculate_score(self, player_id: int) -> Tuple[int, int]:
         """Return a tuple containing first the <player_id>'s score based on
         their goal in the game and second the deductions from their score based
         on the actions they've taken.
         """
-        goal_score = self.players[player_id].goal.score(self.board)
+        goal_score = self.goal_scores()[player_id]
 
         penalty = self.smashes[player_id] * ACTION_PENALTY[SMASH] + \
                   self.combines[player_id] * ACTION_PENALTY[COMBINE] + \
@@ -120,6 +152,125 @@ class GameData:
 
         return goal_score, penalty
 
+    def do_move(self, player_id: int,
+                move: Tuple[str, Optional[int], Block]) -> bool:
+        """Attempt to do <move> for the player with <player_id>, counting it
+        towards their penalties if it is successful.
+
+        Return True iff the move was successful.
+        """
+        action = (move[0], move[1])
+        direction = move[1]
+        block = move[2]
+        move_successful = False
+
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            move_successful = block.rotate(direction)
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            move_successful = block.swap(direction)
+        elif action == SMASH:
+            move_successful = block.smash()
+            self.smashes[player_id] += int(move_successful)
+        elif action == PAINT:
+            move_successful = block.paint(self.players[player_id].goal.colour)
+            self.paints[player_id] += int(move_successful)
+        elif action == COMBINE:
+            move_successful = block.combine()
+            self.combines[player_id] += int(move_successful)
+        elif action == PASS:
+            # Do nothing
+            move_successful = True
+
+        return move_successful
+
+
+class BackgroundMove:
+    """A move being chosen by a computer player in a worker thread, so that the
+    game keeps drawing frames and handling events in the meantime.
+
+    The player chooses its move on a copy of the board, since the board itself
+    is still drawn while it does.
+
+    === Public Attributes ===
+    player:
+        The player choosing the move.
+    """
+    # === Private Attributes ===
+    # _board:
+    #   The board the move is for.
+    # _key:
+    #   The hash of _board when the move started being chosen.
+    # _copy:
+    #   The copy of _board the player chooses its move on.
+    # _move:
+    #   The move chosen on _copy, or None if it has not been chosen yet.
+    # _error:
+    #   The exception raised while choosing the move, if any.
+    # _cancel:
+    #   Set when the move is no longer wanted, so that the player stops.
+    # _thread:
+    #   The worker thread choosing the move.
+    player: Player
+    _board: Block
+    _key: int
+    _copy: Block
+    _move: Optional[Tuple[str, Optional[int], Block]]
+    _error: Optional[BaseException]
+    _cancel: threading.Event
+    _thread: threading.Thread
+
+    def __init__(self, player: Player, board: Block) -> None:
+        """Start <player> choosing its move on <board> in a worker thread.
+
+        <board> must not be mutated until the move is done.
+        """
+        self.player = player
+        self._board = board
+        self._key = board.zobrist_hash()
+        self._copy = board.create_copy()
+        self._move = None
+        self._error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._choose, daemon=True)
+        self._thread.start()
+
+    def _choose(self) -> None:
+        """Choose the player's move on the copy of the board.
+        """
+        try:
+            self._move = self.player.choose_move(self._copy, self._cancel)
+        except BaseException as error:
+            self._error = error
+
+    def done(self) -> bool:
+        """Return True iff the move has been chosen.
+        """
+        return not self._thread.is_alive()
+
+    def cancel(self) -> None:
+        """Tell the player that the move is no longer wanted, so that it stops
+        choosing it as soon as it can.
+        """
+        self._cancel.set()
+
+    def stale(self) -> bool:
+        """Return True iff the board has changed since the move started being
+        chosen, so that the move may no longer be the one the player wants.
+        """
+        return self._board.zobrist_hash() != self._key
+
+    def result(self) -> Tuple[str, Optional[int], Block]:
+        """Return the move that was chosen, acting on a block of the board it
+        was chosen for. Raise the exception the player raised, if any.
+
+        Precondition: self.done() and the move has not been cancelled
+        """
+        if self._error is not None:
+            raise self._error
+        action, direction, block = self._move
+        path = self._copy.locate_path(block.position, block.level)
+        return action, direction, self._board.descendant(path)
+
 
 class GameState:
     """One of the different states that a Blocky game can be in.
@@ -137,6 +288,13 @@ class GameState:
         """
         raise NotImplementedError
 
+    def busy(self) -> bool:
+        """Return True iff this GameState can change without any new events,
+        e.g. while it is animating a move or waiting for a computer player's
+        move, so that it has to keep being updated.
+        """
+        return False
+
     def render(self, renderer: Renderer) -> None:
         """Render the current state of the game onto the screen.
         """
@@ -155,10 +313,19 @@ class MainState(GameState):
     #   The index of the current player in GameData.players.
     # _current_score:
     #   The score of the current player, including penalties.
+    # _thinking:
+    #   The move the current player is choosing in the background, or None.
+    #   A computer player starts choosing its move as soon as the previous
+    #   move is done, while that move is animated.
+    # _asked:
+    #   True iff the current player has been asked to move, and its move is
+    #   being waited for.
     _turn: int
     _data: GameData
     _current_player_index: int
     _current_score: int
+    _thinking: Optional[BackgroundMove]
+    _asked: bool
 
     def __init__(self, data: GameData) -> None:
         """Initialize this GameState.
@@ -166,6 +333,8 @@ class MainState(GameState):
         self._turn = 0
         self._data = data
         self._current_player_index = 0
+        self._thinking = None
+        self._asked = False
 
         score, penalty = self._data.calculate_score(self._current_player().id)
         self._current_score = score - penalty
@@ -190,63 +359,85 @@ class MainState(GameState):
     def _do_move(self, move: Tuple[str, Optional[int], Block]) -> bool:
         """Attempt to do the player's requested move.
         """
-        action = (move[0], move[1])
-        direction = move[1]
-        block = move[2]
-        player = self._current_player()
-        move_successful = False
-
-        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
-            move_successful = block.rotate(direction)
-        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
-            move_successful = block.swap(direction)
-        elif action == SMASH:
-            move_successful = block.smash()
-            self._data.smashes[player.id] += int(move_successful)
-        elif action == PAINT:
-            move_successful = block.paint(self._current_player().goal.colour)
-            self._data.paints[player.id] += int(move_successful)
-        elif action == COMBINE:
-            move_successful = block.combine()
-            self._data.combines[player.id] += int(move_successful)
-        elif action == PASS:
-            # Do nothing
-            move_successful = True
+        move_successful = self._data.do_move(self._current_player().id, move)
 
         if move_successful:
             self._update_player()
 
         return move_successful
 
+    def _think_ahead(self) -> None:
+        """Start the current player choosing its move in the background, if it
+        is a computer player and the game is not over yet.
+        """
+        player = self._current_player()
+        if self._thinking is None and self._turn < self._data.max_turns and \
+                not isinstance(player, HumanPlayer):
+            self._thinking = BackgroundMove(player, self._data.board)
+
     def process_event(self, event: pygame.event.Event) -> None:
         self._current_player().process_event(event)
 
+    def busy(self) -> bool:
+        return self._asked or self._turn >= self._data.max_turns
+
     def update(self) -> GameState:
         if self._turn >= self._data.max_turns:
+            # Stop choosing any move that is still being chosen
+            if self._thinking is not None:
+                self._thinking.cancel()
+                self._thinking = None
             return GameOverState(self._data)
 
-        # Ask the player to make a move
-        move = self._current_player().generate_move(self._data.board)
+        # Ask the player to make a move. A computer player that has been asked
+        # to move chooses it in the background, while this state keeps being
+        # updated and rendered. The move may already have been chosen while
+        # the previous one was animated, unless the board has changed since.
+        player = self._current_player()
+        if player.proceed():
+            self._asked = True
+        thinking = self._thinking
+        if thinking is not None and \
+                (thinking.stale() or thinking.player is not player):
+            # The move is no longer wanted. Wait for the player to stop
+            # before it is asked for another move.
+            thinking.cancel()
+            if not thinking.done():
+                return self
+            self._thinking = None
+        if self._asked and self._thinking is None:
+            self._thinking = BackgroundMove(player, self._data.board)
+
+        if not self._asked:
+            move = player.generate_move(self._data.board)
+        elif self._thinking.done():
+            move = self._thinking.result()
+            self._thinking = None
+            self._asked = False
+        else:
+            move = None
 
         if move is None:
             # No move was made, stay in the current state
             return self
         else:
             # Save what the board looks like before the move
-            background = _block_to_squares(self._data.board)
+            background = self._data.board.create_copy()
             # Also save the current player ID
             player_id = self._current_player().id
 
             # Do the move
             if self._do_move(move):
-                # Animate the move that was just done
+                # Let the next player think while the move that was just done
+                # is animated
+                self._think_ahead()
                 return AnimateMoveState(self, player_id, move, background)
             else:
                 # The move was not valid, let the player try again
                 return self
 
     def render(self, renderer: Renderer) -> None:
-        renderer.draw_board(_block_to_squares(self._data.board))
+        renderer.draw_block(self._data.board)
 
         b = self._current_player().get_selected_block(self._data.board)
         if b is not None:
@@ -272,17 +463,17 @@ class AnimateMoveState(GameState):
     # _start_time:
     #   The time that the animation started.
     # _background:
-    #   The board to display behind the animation.
+    #   A copy of the board as it was before the move, to display behind the
+    #   animation.
     _parent: GameState
     _player_id: int
     _move: Tuple[str, Optional[int], Block]
     _start_time: int
-    _background: List[Tuple[Tuple[int, int, int], Tuple[int, int], int]]
+    _background: Block
 
     def __init__(self, parent: GameState, player_id: int,
                  move: Tuple[str, Optional[int], Block],
-                 background: List[Tuple[Tuple[int, int, int], Tuple[int, int],
-                                        int]]) -> None:
+                 background: Block) -> None:
         """Initialize this GameState.
         """
         self._parent = parent
@@ -294,6 +485,9 @@ class AnimateMoveState(GameState):
     def process_event(self, event: pygame.event.Event) -> None:
         return  # Ignore the event
 
+    def busy(self) -> bool:
+        return True
+
     def update(self) -> GameState:
         elapsed_seconds = (pygame.time.get_ticks() - self._start_time) / 1000
 
@@ -306,7 +500,7 @@ class AnimateMoveState(GameState):
             return self
 
     def render(self, renderer: Renderer) -> None:
-        renderer.draw_board(self._background)
+        renderer.draw_block(self._background)
 
         # Draw an outline around the selected block
         b = self._move[2]
@@ -371,8 +565,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-io': ['run_game'],
         'allowed-import-modules': [
-            'doctest', 'python_ta', 'random', 'typing', 'pygame', '__future__',
-            'block', 'player', 'renderer', 'settings', 'actions'
+            'doctest', 'python_ta', 'random', 'threading', 'typing', 'pygame',
+            '__future__', 'block', 'goal', 'player', 'renderer', 'settings',
+            'actions'
         ],
         'generated-members': 'pygame.*'
     })
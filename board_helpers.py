@@ -0,0 +1,64 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains helpers shared by the *_test.py files, for picking and
+rebuilding blocks of random boards.
+"""
+import random
+from typing import List
+
+from block import Block
+
+
+def random_path(board: Block, rng: random.Random,
+                descend: float = 0.7) -> List[int]:
+    """Return the path to a random block in <board>, going one level deeper
+    with probability <descend> at each level.
+    """
+    path = []
+    block = board
+    while block.children and rng.random() < descend:
+        i = rng.randrange(4)
+        path.append(i)
+        block = block.children[i]
+    return path
+
+
+def block_paths(board: Block, path: List[int] = None) -> List[List[int]]:
+    """Return the paths to every block in <board>, in preorder.
+    """
+    path = path or []
+    paths = [path]
+    for i, child in enumerate(board.children):
+        paths.extend(block_paths(child, path + [i]))
+    return paths
+
+
+def rebuilt(board: Block) -> Block:
+    """Return a copy of <board> built from scratch, without any of its cached
+    summaries.
+    """
+    block = Block(board.position, board.size, board.colour, board.level,
+                  board.max_depth)
+    if board.children:
+        block.children = [rebuilt(child) for child in board.children]
+    return block
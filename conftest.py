@@ -0,0 +1,36 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains the pytest configuration shared by the *_test.py files:
+the random seeds that the randomised tests are run with.
+"""
+import pytest
+
+# The number of random seeds each randomised test is run with
+NUM_SEEDS = 50
+
+
+@pytest.fixture(params=range(NUM_SEEDS))
+def seed(request: pytest.FixtureRequest) -> int:
+    """Return a seed for a randomised test, which is run once per seed.
+    """
+    return request.param
@@ -0,0 +1,160 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains a headless engine that plays games of Blocky between
+computer players without a display: players are asked for their moves
+directly, nothing is drawn or animated, and the result of each game is
+returned as a GameOutcome.
+"""
+from typing import Dict, List, Optional, Tuple
+import random
+
+from block import Block, generate_board
+from blocky import GameData
+from player import Player, create_players
+from settings import BOARD_SIZE
+
+# A move as recorded by the engine: the turn it was made on, the ID of the
+# player who made it, the action name and direction, and the path of child
+# indices from the root of the board to the block it was made on
+MoveRecord = Tuple[int, int, str, Optional[int], List[int]]
+
+
+class GameOutcome:
+    """The result of a game played by the engine.
+
+    === Public Attributes ===
+    num_turns:
+        The number of turns that were played.
+    scores:
+        The score of each player based on their goal at the end of the game,
+        keyed by player ID.
+    penalties:
+        The deductions from each player's score based on the actions they
+        took, keyed by player ID.
+    moves:
+        Every move made in the game, in order.
+    winner:
+        The ID of the player with the highest score after penalties. Ties go
+        to the player who moved first.
+    """
+    num_turns: int
+    scores: Dict[int, int]
+    penalties: Dict[int, int]
+    moves: List[MoveRecord]
+    winner: int
+
+    def __init__(self, num_turns: int, scores: Dict[int, int],
+                 penalties: Dict[int, int], moves: List[MoveRecord]) -> None:
+        """Initialize the outcome of a game with the given final scores and
+        penalties, in which <moves> were made over <num_turns> turns.
+
+        Precondition: scores and penalties have the same, non-empty keys.
+        """
+        self.num_turns = num_turns
+        self.scores = scores
+        self.penalties = penalties
+        self.moves = moves
+        self.winner = max(scores, key=self.total)
+
+    def total(self, player_id: int) -> int:
+        """Return the final score of the player with <player_id>, after
+        penalties.
+        """
+        return self.scores[player_id] - self.penalties[player_id]
+
+
+def request_move(player: Player, board: Block) -> \
+        Tuple[str, Optional[int], Block]:
+    """Return the move <player> would like to make on <board>, without
+    waiting for any event.
+
+    Raise a ValueError if <player> cannot move without a display, i.e. if it
+    is a HumanPlayer.
+    """
+    try:
+        return player.choose_move(board)
+    except NotImplementedError:
+        raise ValueError(f'Player {player.id} cannot move without a display') \
+            from None
+
+
+def play_game(board: Block, players: List[Player],
+              num_turns: int) -> GameOutcome:
+    """Play a game of <num_turns> turns on <board> between <players>, and
+    return its outcome. <board> is changed by the moves made.
+
+    Players take turns in the order of <players>, and a turn is over once
+    every player has made a move. As in the game with a display, a player
+    whose move cannot be performed is asked for another one.
+
+    Preconditions:
+        - len(players) >= 1
+        - no player is a HumanPlayer
+    """
+    data = GameData(board, players)
+    data.max_turns = num_turns
+    moves = []
+    for turn in range(num_turns):
+        for player in players:
+            while True:
+                move = request_move(player, board)
+                block = move[2]
+                path = board.locate_path(block.position, block.level)
+                if data.do_move(player.id, move):
+                    moves.append((turn, player.id, move[0], move[1], path))
+                    break
+
+    scores = {}
+    penalties = {}
+    for player in players:
+        scores[player.id], penalties[player.id] = \
+            data.calculate_score(player.id)
+    return GameOutcome(num_turns, scores, penalties, moves)
+
+
+def play_auto_game(max_depth: int, num_random: int, smart_players: List[int],
+                   num_turns: int, seed: Optional[int] = None) -> GameOutcome:
+    """Play a game of <num_turns> turns between <num_random> random players
+    and a smart player for each difficulty in <smart_players>, on a new board
+    with <max_depth>, and return its outcome.
+
+    If <seed> is given, the random number generator is seeded with it first,
+    so the same arguments always give the same game.
+
+    Precondition: num_random + len(smart_players) >= 1
+    """
+    if seed is not None:
+        random.seed(seed)
+    board = generate_board(max_depth, BOARD_SIZE)
+    players = create_players(0, num_random, smart_players)
+    return play_game(board, players, num_turns)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', 'block', 'blocky',
+            'player', 'settings'
+        ]
+    })
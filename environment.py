@@ -0,0 +1,396 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains the BatchEnvironment class, which holds many independent
+Blocky boards as NumPy arrays and performs one action on each of them per
+step, for training and evaluating computer players.
+"""
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import math
+import numpy as np
+
+from actions import ACTION_PENALTY, PASS
+from block import Block
+from goal import BlobGoal, Goal
+from moves import BLOCK_ACTIONS
+from settings import COLOUR_INDEX, COLOUR_LIST
+
+# The actions of a BatchEnvironment, numbered by their index in this list
+BATCH_ACTIONS = BLOCK_ACTIONS + [PASS]
+# The kinds of goal of a BatchEnvironment
+PERIMETER = 0
+BLOB = 1
+
+_PENALTIES = np.array([ACTION_PENALTY[action] for action in BATCH_ACTIONS])
+_ROTATE_CW, _ROTATE_CCW, _SWAP_H, _SWAP_V, _SMASH, _COMBINE, _PAINT, _PASS = \
+    range(len(BATCH_ACTIONS))
+
+
+def _level_offsets(max_depth: int,
+                   level: int) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Return the flat index of every unit cell of a block at <level> in the
+    upper left corner of a board with <max_depth>, relative to that corner,
+    and where each cell's new contents come from when the block is rotated
+    clockwise, rotated counter-clockwise, swapped horizontally and swapped
+    vertically, in that order.
+
+    Cells are flattened column by column, and so are the offsets of a block.
+    """
+    width = 2 ** max_depth
+    size = width >> level
+    half = size // 2
+    x, y = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    sources = [
+        # A clockwise turn moves the cell at (x, y) to (size - 1 - y, x)
+        (y, size - 1 - x),
+        (size - 1 - y, x),
+        ((x + half) % size, y),
+        (x, (y + half) % size)
+    ]
+    offsets = (x * width + y).ravel()
+    return offsets, [(column * width + row).ravel()
+                     for column, row in sources]
+
+
+class BatchEnvironment:
+    """Many independent Blocky boards with the same max_depth, each with a
+    single player and goal, that are all changed together.
+
+    Each board is represented by its unit cells: the index in COLOUR_LIST of
+    the colour of each cell, and the level of the leaf block that covers it,
+    which is enough to tell which blocks exist. Actions are performed on all
+    the boards at once with array operations, using index permutations for
+    rotating and swapping that are computed once per level.
+
+    An action is given as a row of four ints: the index of the action in
+    BATCH_ACTIONS, a level, and the column and row of a unit cell. It is
+    performed on the block at that level that includes that cell, or on the
+    leaf that includes that cell if there is no block at that level, as in
+    Block.locate. Paints use the colour of the board's goal.
+
+    === Public Attributes ===
+    num_boards:
+        The number of boards.
+    max_depth:
+        The max_depth of every board.
+    width:
+        The number of unit cells along each side of a board.
+    colours:
+        colours[b, i, j] is the index in COLOUR_LIST of the colour of the unit
+        cell at column i and row j of board b.
+    levels:
+        levels[b, i, j] is the level of the leaf of board b that covers the
+        unit cell at column i and row j.
+    kinds:
+        The kind of goal of each board, PERIMETER or BLOB.
+    targets:
+        The index in COLOUR_LIST of the colour of each board's goal.
+    scores:
+        The score of each board's goal on the board.
+
+    === Representation Invariants ===
+    - colours.shape == levels.shape == (num_boards, width, width)
+    - kinds.shape == targets.shape == scores.shape == (num_boards,)
+    - width == 2 ** max_depth
+    """
+    # === Private Attributes ===
+    # _rng:
+    #   The random number generator for new boards, goals and smashes.
+    # _offsets:
+    #   For each level below max_depth, the offsets and permutations returned
+    #   by _level_offsets.
+    num_boards: int
+    max_depth: int
+    width: int
+    colours: np.ndarray
+    levels: np.ndarray
+    kinds: np.ndarray
+    targets: np.ndarray
+    scores: np.ndarray
+    _rng: np.random.Generator
+    _offsets: List[Tuple[np.ndarray, List[np.ndarray]]]
+
+    def __init__(self, num_boards: int, max_depth: int,
+                 seed: Optional[int] = None) -> None:
+        """Initialize an environment of <num_boards> random boards with
+        <max_depth>, like those made by generate_board, each with a random
+        goal.
+
+        If <seed> is given, the boards, goals and smashes are always the same
+        for the same seed.
+
+        Precondition: num_boards >= 1 and max_depth >= 0
+        """
+        self.num_boards = num_boards
+        self.max_depth = max_depth
+        self.width = 2 ** max_depth
+        self._rng = np.random.default_rng(seed)
+        self._offsets = [_level_offsets(max_depth, level)
+                         for level in range(max_depth)]
+        self.reset()
+
+    @classmethod
+    def from_blocks(cls, boards: List[Block],
+                    goals: List[Goal]) -> BatchEnvironment:
+        """Return an environment with copies of <boards>, where board i has
+        goal <goals[i]>.
+
+        Preconditions:
+            - len(boards) == len(goals) >= 1
+            - every board in <boards> is a root with the same max_depth
+        """
+        env = cls(len(boards), boards[0].max_depth)
+        for b, board in enumerate(boards):
+            for column, row, width, colour in board.leaf_cells():
+                cells = (b, slice(column, column + width),
+                         slice(row, row + width))
+                env.colours[cells] = COLOUR_INDEX[colour]
+                env.levels[cells] = board.max_depth - int(math.log2(width))
+        env.kinds[:] = [BLOB if isinstance(goal, BlobGoal) else PERIMETER
+                        for goal in goals]
+        env.targets[:] = [COLOUR_INDEX[goal.colour] for goal in goals]
+        env.scores = env.score(np.arange(env.num_boards))
+        return env
+
+    def reset(self) -> np.ndarray:
+        """Replace every board with a new random board and give it a new
+        random goal, and return the observations of the new boards.
+        """
+        shape = (self.num_boards, self.width, self.width)
+        self.colours = np.zeros(shape, dtype=np.uint8)
+        self.levels = np.zeros(shape, dtype=np.uint8)
+        boards = np.arange(self.num_boards)
+        if self.max_depth == 0:
+            self.colours[:] = self._rng.integers(
+                len(COLOUR_LIST), size=(self.num_boards, 1, 1))
+        else:
+            self._smash(boards, np.zeros(self.num_boards, dtype=np.int64), 0)
+        self.kinds = self._rng.integers(2, size=self.num_boards)
+        self.targets = self._rng.integers(len(COLOUR_LIST),
+                                          size=self.num_boards)
+        self.scores = self.score(boards)
+        return self.observations()
+
+    def observations(self) -> np.ndarray:
+        """Return the colours of the unit cells of every board, as an array
+        of shape (num_boards, width, width).
+        """
+        return self.colours.copy()
+
+    def step(self, actions: np.ndarray) -> \
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Perform actions[b] on board b for every board b, and return the
+        observations of the boards afterwards, the reward for each action, and
+        whether each action was performed.
+
+        <actions> has one row per board, as described in the class docstring.
+        The reward for an action is the change in the score of the board's
+        goal, minus the action's penalty if it was performed. An action that
+        cannot be performed changes nothing and has a reward of 0.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        kind, level, column, row = actions.T
+        boards = np.arange(self.num_boards)
+        leaf = self.levels[boards, column, row].astype(np.int64)
+        level = np.minimum(level, leaf)
+        shift = self.max_depth - level
+        origin = ((column >> shift) << shift) * self.width + \
+            ((row >> shift) << shift)
+        has_children = leaf > level
+
+        done = kind == _PASS
+        for action in (_ROTATE_CW, _ROTATE_CCW, _SWAP_H, _SWAP_V):
+            chosen = (kind == action) & has_children
+            for depth in np.unique(level[chosen]):
+                group = boards[chosen & (level == depth)]
+                offsets, sources = self._offsets[depth]
+                self._permute(group, origin[group], offsets, sources[action])
+            done |= chosen
+
+        chosen = (kind == _SMASH) & ~has_children & (level < self.max_depth)
+        for depth in np.unique(level[chosen]):
+            group = boards[chosen & (level == depth)]
+            self._smash(group, origin[group], depth)
+        done |= chosen
+
+        chosen = (kind == _PAINT) & (level == self.max_depth)
+        flat = self.colours.reshape(self.num_boards, -1)
+        chosen &= flat[boards, origin] != self.targets
+        flat[boards[chosen], origin[chosen]] = self.targets[chosen]
+        done |= chosen
+
+        chosen = (kind == _COMBINE) & (level == self.max_depth - 1) & \
+            has_children
+        done |= self._combine(boards[chosen], origin[chosen])
+
+        changed = boards[done & (kind != _PASS)]
+        old_scores = self.scores.copy()
+        self.scores[changed] = self.score(changed)
+        rewards = np.where(done, self.scores - old_scores - _PENALTIES[kind],
+                           0)
+        return self.observations(), rewards, done
+
+    def _permute(self, group: np.ndarray, origin: np.ndarray,
+                 offsets: np.ndarray, sources: np.ndarray) -> None:
+        """Move the unit cells of the blocks at <origin> on the boards in
+        <group>, so that the cell at each of <offsets> from its block's origin
+        gets the contents of the cell at the same index of <sources>.
+        """
+        rows = group[:, None]
+        targets = origin[:, None] + offsets
+        moved = origin[:, None] + sources
+        for cells in (self.colours, self.levels):
+            flat = cells.reshape(self.num_boards, -1)
+            flat[rows, targets] = flat[rows, moved]
+
+    def _smash(self, group: np.ndarray, origin: np.ndarray,
+               level: int) -> None:
+        """Smash the leaves at <level> at <origin> on the boards in <group>.
+
+        As in Block.smash, each new block gets a random colour, and is itself
+        smashed with probability exp(-0.25 * its level) unless it is at
+        max_depth.
+        """
+        n = len(group)
+        size = self.width >> level
+        levels = np.full((n, size, size), level + 1, dtype=np.uint8)
+        colours = np.zeros((n, size, size), dtype=np.uint8)
+        for depth in range(level + 1, self.max_depth + 1):
+            blocks = 2 ** (depth - level)
+            cell = size // blocks
+            new = self._rng.integers(len(COLOUR_LIST),
+                                     size=(n, blocks, blocks))
+            leaves = levels == depth
+            colours[leaves] = _upscale(new, cell)[leaves]
+            if depth < self.max_depth:
+                split = self._rng.random((n, blocks, blocks)) < \
+                    math.exp(-0.25 * depth)
+                levels[leaves & _upscale(split, cell)] += 1
+
+        offsets = self._offsets[level][0]
+        targets = origin[:, None] + offsets
+        self.colours.reshape(self.num_boards, -1)[group[:, None], targets] = \
+            colours.reshape(n, -1)
+        self.levels.reshape(self.num_boards, -1)[group[:, None], targets] = \
+            levels.reshape(n, -1)
+
+    def _combine(self, group: np.ndarray, origin: np.ndarray) -> np.ndarray:
+        """Combine the blocks at level max_depth - 1 at <origin> on the boards
+        in <group> that have a majority colour, and return a mask over all
+        boards of the boards that were combined.
+        """
+        combined = np.zeros(self.num_boards, dtype=bool)
+        if len(group) == 0:
+            return combined
+        offsets = self._offsets[self.max_depth - 1][0]
+        targets = origin[:, None] + offsets
+        flat = self.colours.reshape(self.num_boards, -1)
+        children = flat[group[:, None], targets]
+        counts = np.stack([np.count_nonzero(children == colour, axis=1)
+                           for colour in range(len(COLOUR_LIST))], axis=1)
+        majority = counts.argmax(axis=1)
+        top = counts.max(axis=1)
+        unique = np.count_nonzero(counts == top[:, None], axis=1) == 1
+        group, targets, majority = group[unique], targets[unique], \
+            majority[unique]
+        flat[group[:, None], targets] = majority[:, None]
+        self.levels.reshape(self.num_boards, -1)[group[:, None], targets] = \
+            self.max_depth - 1
+        combined[group] = True
+        return combined
+
+    def score(self, group: np.ndarray) -> np.ndarray:
+        """Return the score of the goal of each board in <group> on that
+        board.
+        """
+        scores = np.zeros(len(group), dtype=np.int64)
+        perimeter = self.kinds[group] == PERIMETER
+        boards = group[perimeter]
+        if len(boards):
+            cells = self.colours[boards] == \
+                self.targets[boards][:, None, None]
+            scores[perimeter] = cells[:, 0, :].sum(axis=1) + \
+                cells[:, -1, :].sum(axis=1) + cells[:, :, 0].sum(axis=1) + \
+                cells[:, :, -1].sum(axis=1)
+        boards = group[~perimeter]
+        if len(boards):
+            scores[~perimeter] = _largest_blobs(
+                self.colours[boards] == self.targets[boards][:, None, None])
+        return scores
+
+
+def _upscale(blocks: np.ndarray, cell: int) -> np.ndarray:
+    """Return <blocks>, an array of shape (n, k, k), with every entry repeated
+    into a <cell> by <cell> square.
+    """
+    return blocks.repeat(cell, axis=1).repeat(cell, axis=2)
+
+
+def _largest_blobs(cells: np.ndarray) -> np.ndarray:
+    """Return the size of the largest blob of True cells in each board of
+    <cells>, an array of shape (n, width, width).
+
+    Every True cell starts with its own flat index as its label, and labels
+    spread to neighbouring True cells, keeping the smallest, until they stop
+    changing. Each cell also jumps to the label of the cell its label names,
+    so long blobs take far fewer rounds than their length. Boards whose labels
+    have stopped changing are left out of later rounds.
+    """
+    n, width, _ = cells.shape
+    size = width * width
+    # Cells that are not in a blob get the label <size>, which names an extra
+    # cell that keeps that label
+    labels = np.where(cells, np.arange(size).reshape(width, width), size)
+    active = np.arange(n)
+    while len(active):
+        old = labels[active]
+        new = old.copy()
+        np.minimum(new[:, 1:], old[:, :-1], out=new[:, 1:])
+        np.minimum(new[:, :-1], old[:, 1:], out=new[:, :-1])
+        np.minimum(new[:, :, 1:], old[:, :, :-1], out=new[:, :, 1:])
+        np.minimum(new[:, :, :-1], old[:, :, 1:], out=new[:, :, :-1])
+        new[~cells[active]] = size
+        flat = new.reshape(len(active), size)
+        padded = np.concatenate(
+            [flat, np.full((len(active), 1), size, dtype=flat.dtype)], axis=1)
+        new = np.take_along_axis(padded, flat, axis=1).reshape(old.shape)
+        changed = (new != old).reshape(len(active), -1).any(axis=1)
+        labels[active] = new
+        active = active[changed]
+    boards = np.arange(n)[:, None, None] * (size + 1)
+    sizes = np.bincount((labels + boards)[cells], minlength=n * (size + 1))
+    return sizes.reshape(n, -1).max(axis=1)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'math', 'numpy',
+            'actions', 'block', 'goal', 'moves', 'settings'
+        ],
+        'max-attributes': 15
+    })
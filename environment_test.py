@@ -0,0 +1,79 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for environment.py, checking that a
+BatchEnvironment changes a board the same way Block does.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from actions import ACTION_PENALTY
+from block import generate_board
+from environment import BATCH_ACTIONS, BatchEnvironment
+from goal import BlobGoal, PerimeterGoal
+from settings import COLOUR_LIST
+
+
+def test_step_matches_block(seed: int) -> None:
+    """Test that a step of a BatchEnvironment with a single board gives the
+    same board, score and reward as making the same move on a Block.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    board = generate_board(rng.randint(1, 4), 750)
+    kind = rng.choice((PerimeterGoal, BlobGoal))
+    goal = kind(rng.choice(COLOUR_LIST))
+    env = BatchEnvironment.from_blocks([board], [goal])
+
+    for _ in range(10):
+        # Smashing is random, so only the moves that are not are compared
+        index = rng.randrange(len(BATCH_ACTIONS))
+        while BATCH_ACTIONS[index][0] == 'smash':
+            index = rng.randrange(len(BATCH_ACTIONS))
+        level = rng.randint(0, board.max_depth)
+        column = rng.randrange(env.width)
+        row = rng.randrange(env.width)
+
+        cell = board.size / env.width
+        location = (board.position[0] + int((column + 0.5) * cell),
+                    board.position[1] + int((row + 0.5) * cell))
+        block = board.locate(location, level)
+        old_score = goal.score(board)
+        done = block.apply_action(BATCH_ACTIONS[index], goal.colour)
+
+        _, rewards, dones = env.step(np.array([[index, level, column, row]]))
+        expected = BatchEnvironment.from_blocks([board], [goal])
+        assert dones[0] == done
+        assert np.array_equal(env.colours, expected.colours)
+        assert np.array_equal(env.levels, expected.levels)
+        assert env.scores[0] == goal.score(board)
+        if done:
+            assert rewards[0] == goal.score(board) - old_score - \
+                ACTION_PENALTY[BATCH_ACTIONS[index]]
+        else:
+            assert rewards[0] == 0
+
+
+if __name__ == '__main__':
+    pytest.main(['environment_test.py'])
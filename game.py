@@ -25,18 +25,24 @@ Blocky game.
 At the bottom of the file, there are some function that you
 can call to try playing the game in several different configurations.
 """
+import time
 from typing import List
 import pygame
 
-from blocksepehr import generate_board
+from block import generate_board
 from blocky import GameData, GameState, MainState
-from playersepher import create_players
+from player import create_players
 from renderer import Renderer
 from settings import BOARD_SIZE
 
 
 class Game:
     """A game of Blocky.
+
+    === Public Attributes ===
+    frame_time:
+        The time in milliseconds it took to update and draw the last frame
+        that was drawn.
     """
     # === Private Attributes ===
     # _renderer:
@@ -45,6 +51,7 @@ class Game:
     #   The data of the game that can be shared with other GameState objects.
     # _state:
     #   The current GameState.
+    frame_time: float
     _renderer: Renderer
     _data: GameData
     _state: GameState
@@ -61,21 +68,34 @@ class Game:
         board = generate_board(max_depth, BOARD_SIZE)
         players = create_players(num_human, num_random, smart_players)
 
-        self._renderer = Renderer(BOARD_SIZE)
+        self._renderer = Renderer(BOARD_SIZE, max_depth)
         self._data = GameData(board, players)
         self._state = MainState(self._data)
+        self.frame_time = 0.0
 
-    def run_game(self, num_turns: int) -> None:
+    def run_game(self, num_turns: int, wait_for_events: bool = True) -> None:
         """Start the main game loop and stop after num_turns.
+
+        If <wait_for_events> is True, the loop sleeps until the next event
+        whenever the game cannot change without one, and a frame is only drawn
+        after input, or when the game state or the board has changed. Otherwise
+        every frame is drawn, 30 times a second.
         """
         self._data.max_turns = num_turns
         clock = pygame.time.Clock()
+        drawn = None
 
         while True:
-            clock.tick(30)
+            if wait_for_events and not self._state.busy():
+                # Nothing can happen until there is input
+                events = [pygame.event.wait()] + pygame.event.get()
+            else:
+                clock.tick(30)
+                events = pygame.event.get()
+            start = time.perf_counter()
 
             # Process events
-            for e in pygame.event.get():
+            for e in events:
                 if e.type == pygame.QUIT:
                     return
                 else:
@@ -84,12 +104,19 @@ class Game:
             # Update the state of the game
             self._state = self._state.update()
 
+            shown = (self._state, self._data.board.zobrist_hash())
+            if wait_for_events and not events and shown == drawn:
+                # The screen would look the same
+                continue
+            drawn = shown
+
             # Render the new state of the game
             self._renderer.clear()
             self._state.render(self._renderer)
 
             # Update the screen
             pygame.display.flip()
+            self.frame_time = (time.perf_counter() - start) * 1000
 
 
 def create_auto_game() -> Game:
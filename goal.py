@@ -24,9 +24,10 @@ This file contains the hierarchy of Goal classes.
 from __future__ import annotations
 import math
 import random
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from block import Block
-from settings import colour_name, COLOUR_LIST
+from settings import colour_name, COLOUR_INDEX, COLOUR_LIST
 
 
 def generate_goals(num_goals: int) -> List[Goal]:
@@ -105,6 +106,217 @@ def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
         return matrix
 
 
+def _flatten_indices(block: Block) -> np.ndarray:
+    """Return a two-dimensional array representing <block> as columns and
+    rows of unit cells, like _flatten, but with each unit cell holding the
+    index of its colour in COLOUR_LIST.
+
+    For 0 <= i, j < 2^{max_depth - self.level}, A[i, j] represents the unit
+    cell at column i and row j.
+
+    Leaves of the same size are written in a single vectorised store, each
+    filling its whole region of the array.
+
+    Precondition: the colour of every leaf in <block> is in COLOUR_LIST.
+    """
+    width = 2 ** (block.max_depth - block.level)
+    grid = np.empty((width, width), dtype=np.uint8)
+
+    # Map each leaf size to the columns, rows and colours of those leaves
+    leaves = {}
+    for column, row, size, colour in block.leaf_cells():
+        if size not in leaves:
+            leaves[size] = ([], [], [])
+        leaves[size][0].append(column // size)
+        leaves[size][1].append(row // size)
+        leaves[size][2].append(COLOUR_INDEX[colour])
+
+    for size, (columns, rows, colours) in leaves.items():
+        # View the grid as a grid of <size> by <size> tiles
+        tiles = grid.reshape(width // size, size, width // size, size)
+        tiles[columns, :, rows, :] = \
+            np.array(colours, dtype=np.uint8)[:, None, None]
+    return grid
+
+
+class _Blobs:
+    """The blobs of a flattened board, i.e. its connected groups of adjacent
+    unit cells of the same colour, found in one pass without recursion.
+
+    === Public Attributes ===
+    grid:
+        The flattened board, as returned by _flatten_indices.
+    labels:
+        The label of the blob that each unit cell of <grid> belongs to.
+    sizes:
+        The number of unit cells in the blob with each label. Labels that are
+        not used by any cell have size 0.
+    colours:
+        The colour index of the blob with each label.
+    """
+    grid: np.ndarray
+    labels: np.ndarray
+    sizes: np.ndarray
+    colours: np.ndarray
+
+    def __init__(self, grid: np.ndarray) -> None:
+        """Find the blobs of <grid>.
+
+        Each cell is given the label of the cell before it in its column or the
+        cell to its left if either has the same colour, recording that the two
+        labels are the same blob when both do. Each label is then replaced by
+        the label that represents its blob.
+        """
+        cells = grid.tolist()
+        width = len(cells)
+        # parent[l] is a label in the same blob as l, or l itself if l is the
+        # label that represents its blob
+        parent = []
+        colours = []
+        provisional = []
+        for i in range(width):
+            column = cells[i]
+            labels = [0] * width
+            for j in range(width):
+                colour = column[j]
+                above = labels[j - 1] if j > 0 and column[j - 1] == colour \
+                    else -1
+                left = provisional[i - 1][j] \
+                    if i > 0 and cells[i - 1][j] == colour else -1
+                if above < 0 and left < 0:
+                    labels[j] = len(parent)
+                    parent.append(len(parent))
+                    colours.append(colour)
+                elif left < 0:
+                    labels[j] = above
+                else:
+                    labels[j] = left
+                    if above >= 0:
+                        _union(parent, above, left)
+            provisional.append(labels)
+
+        roots = np.array([_find(parent, label)
+                          for label in range(len(parent))], dtype=np.int64)
+        self.grid = grid
+        self.labels = roots[np.array(provisional, dtype=np.int64)] \
+            if parent else np.zeros(grid.shape, dtype=np.int64)
+        self.sizes = np.bincount(self.labels.ravel(), minlength=len(parent))
+        self.colours = np.array(colours, dtype=np.uint8)
+
+    def updated(self, grid: np.ndarray) -> _Blobs:
+        """Return the blobs of <grid>, a flattened board of the same size as
+        self.grid, reusing the blobs found for self.grid.
+
+        Only the blobs that touch the changed cells (or their neighbours) are
+        labelled again, so the cost is roughly the size of the change plus the
+        size of those blobs. If they cover most of the board, it is labelled
+        from scratch instead. self is updated in place and returned, unless
+        a new _Blobs is returned instead.
+        """
+        if grid.shape != self.grid.shape or \
+                len(self.sizes) > 4 * self.grid.size:
+            return _Blobs(grid)
+        changed = np.argwhere(grid != self.grid)
+        if changed.size == 0:
+            self.grid = grid
+            return self
+
+        # Every blob with a cell in or next to the changed area may be split,
+        # merged or resized; no other blob touches the changed area
+        width = grid.shape[0]
+        low = np.maximum(changed.min(axis=0) - 1, 0)
+        high = np.minimum(changed.max(axis=0) + 2, width)
+        affected = np.unique(self.labels[low[0]:high[0], low[1]:high[1]])
+        region = np.isin(self.labels, affected)
+        if np.count_nonzero(region) > grid.size // 2:
+            return _Blobs(grid)
+
+        self._relabel(grid, region)
+        self.sizes[affected] = 0
+        return self
+
+    def _relabel(self, grid: np.ndarray, region: np.ndarray) -> None:
+        """Give new labels to the blobs of <grid> made of the cells where
+        <region> is True, and make <grid> self.grid.
+        """
+        cells = grid.tolist()
+        pending = region.tolist()
+        width = len(cells)
+        first_label = len(self.sizes)
+        sizes = []
+        colours = []
+        columns = []
+        rows = []
+        labels = []
+        for i, j in np.argwhere(region).tolist():
+            if not pending[i][j]:
+                continue
+            colour = cells[i][j]
+            label = first_label + len(sizes)
+            pending[i][j] = False
+            stack = [(i, j)]
+            size = 0
+            while stack:
+                x, y = stack.pop()
+                size += 1
+                columns.append(x)
+                rows.append(y)
+                labels.append(label)
+                for a, b in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if 0 <= a < width and 0 <= b < width and pending[a][b] \
+                            and cells[a][b] == colour:
+                        pending[a][b] = False
+                        stack.append((a, b))
+            sizes.append(size)
+            colours.append(colour)
+
+        self.grid = grid
+        self.labels[columns, rows] = labels
+        self.sizes = np.concatenate([self.sizes,
+                                     np.array(sizes, dtype=self.sizes.dtype)])
+        self.colours = np.concatenate([self.colours,
+                                       np.array(colours, dtype=np.uint8)])
+
+    def largest(self, colour: int) -> int:
+        """Return the size of the largest blob whose colour index is <colour>,
+        or 0 if there is none.
+        """
+        sizes = self.sizes[self.colours == colour]
+        return int(sizes.max()) if sizes.size > 0 else 0
+
+
+def _find(parent: List[int], label: int) -> int:
+    """Return the label that represents the blob of <label> in <parent>,
+    shortening the path to it on the way.
+    """
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+    return label
+
+
+def _union(parent: List[int], label1: int, label2: int) -> None:
+    """Record in <parent> that <label1> and <label2> are in the same blob.
+    """
+    root1 = _find(parent, label1)
+    root2 = _find(parent, label2)
+    if root1 != root2:
+        parent[max(root1, root2)] = min(root1, root2)
+
+
+def score_goals(goals: List[Goal], board: Block) -> List[int]:
+    """Return the score of each goal in <goals> on <board>, in the same order.
+
+    Goals of the same kind share a single pass over the board (e.g. one
+    labelling of its blobs), however many colours they are for.
+    """
+    scores = {}
+    for goal in goals:
+        if type(goal) not in scores:
+            scores[type(goal)] = goal.scores(board)
+    return [scores[type(goal)][goal.colour] for goal in goals]
+
+
 class Goal:
     """A player goal in the game of Blocky.
 
@@ -129,6 +341,13 @@ class Goal:
         """
         raise NotImplementedError
 
+    def scores(self, board: Block) -> Dict[Tuple[int, int, int], int]:
+        """Return the score a goal like this one would have on the given
+        board for each colour in COLOUR_LIST.
+        """
+        return {colour: type(self)(colour).score(board)
+                for colour in COLOUR_LIST}
+
     def description(self) -> str:
         """Return a description of this goal.
         """
@@ -140,28 +359,15 @@ class PerimeterGoal(Goal):
     def score(self, board: Block) -> int:
         # TODO: Implement me
 
-        flattened_board = _flatten(board)
-        count = 0
-        top = flattened_board[0]
-        bottom = flattened_board[len(flattened_board) - 1]
-        left = []
-        right = []
-        for sublist in flattened_board:
-            left.append(sublist[0])
-            right.append(sublist[len(flattened_board) - 1])
-        for colour in top:
-            if colour == self.colour:
-                count += 1
-        for colour in bottom:
-            if colour == self.colour:
-                count += 1
-        for colour in left:
-            if colour == self.colour:
-                count += 1
-        for colour in right:
-            if colour == self.colour:
-                count += 1
-        return count
+        # Only the blocks along the sides are visited, using the counts they
+        # cache. Corner cells are on two sides, so they are counted twice.
+        target = COLOUR_INDEX[self.colour]
+        return sum(board.edge_counts(side)[target] for side in range(4))
+
+    def scores(self, board: Block) -> Dict[Tuple[int, int, int], int]:
+        counts = [sum(side) for side in
+                  zip(*[board.edge_counts(side) for side in range(4)])]
+        return dict(zip(COLOUR_LIST, counts))
 
     def description(self) -> str:
         " Return a string representing a description of perimeter goal. "
@@ -171,30 +377,46 @@ class PerimeterGoal(Goal):
 
 
 class BlobGoal(Goal):
-    """ A goal for biggest blob."""
+    """ A goal for biggest blob.
+
+    === Private Attributes ===
+    _blobs:
+        The blobs of the board that was scored last, or None if no board has
+        been scored yet.
+    """
+    _blobs: Optional[_Blobs]
+
+    def __init__(self, target_colour: Tuple[int, int, int]) -> None:
+        """Initialize this goal to have the given target colour.
+        """
+        Goal.__init__(self, target_colour)
+        self._blobs = None
+
     def score(self, board: Block) -> int:
-        # TODO: Implement me
-        flattened_board = _flatten(board)
-        visited_map = []
-        dummy_visited_map = []
-        for i in range(len(flattened_board)):
-            sublist = []
-            for j in range(len(flattened_board)):
-                sublist.append(-1)
-            visited_map.append(sublist)
-            dummy_visited_map.append(sublist[:])
-
-        dummy_flattened_board = _flatten(board)
-
-        maximum = 0
-        for i in range(len(flattened_board)):
-            for j in range(len(flattened_board)):
-                if self._undiscovered_blob_size((i, j), dummy_flattened_board,
-                                                dummy_visited_map) > maximum:
-                    maximum = self._undiscovered_blob_size((i, j),
-                                                           flattened_board,
-                                                           visited_map)
-        return maximum
+        """Return the size of the largest blob of this goal's colour on
+        <board>.
+
+        The blobs of the last board scored are kept, and only the blobs
+        around the cells that differ on <board> are found again, so scoring a
+        board one move away from the last one is cheap.
+        """
+        return self._label(board).largest(COLOUR_INDEX[self.colour])
+
+    def scores(self, board: Block) -> Dict[Tuple[int, int, int], int]:
+        blobs = self._label(board)
+        return {colour: blobs.largest(COLOUR_INDEX[colour])
+                for colour in COLOUR_LIST}
+
+    def _label(self, board: Block) -> _Blobs:
+        """Return the blobs of <board>, updating the blobs kept from the
+        last board.
+        """
+        grid = _flatten_indices(board)
+        if self._blobs is None:
+            self._blobs = _Blobs(grid)
+        else:
+            self._blobs = self._blobs.updated(grid)
+        return self._blobs
 
     def _undiscovered_blob_size(self, pos: Tuple[int, int],
                                 board: List[List[Tuple[int, int, int]]],
@@ -205,7 +427,8 @@ class BlobGoal(Goal):
 
         If <pos> is out of bounds for <board>, return 0.
 
-        <board> is the flattened board on which to search for the blob.
+        <board> is the flattened board on which to search for the blob, as
+        returned by _flatten.
         <visited> is a parallel structure that, in each cell, contains:
             -1 if this cell has never been visited
             0  if this cell has been visited and discovered
@@ -215,11 +438,18 @@ class BlobGoal(Goal):
 
         Update <visited> so that all cells that are visited are marked with
         either 0 or 1.
+
+        >>> goal = BlobGoal(COLOUR_LIST[0])
+        >>> board = Block((0, 0), 750, COLOUR_LIST[0], 0, 1)
+        >>> visited = [[-1, -1], [-1, -1]]
+        >>> goal._undiscovered_blob_size((0, 0), _flatten(board), visited)
+        4
         """
         # TODO: Implement me
 
+        target = self.colour
         count = 0
-        if board[pos[0]][pos[1]] == self.colour and visited[pos[0]][pos[1]] == -1:
+        if board[pos[0]][pos[1]] == target and visited[pos[0]][pos[1]] == -1:
             visited[pos[0]][pos[1]] = 1
             count += 1
         else:
@@ -229,7 +459,7 @@ class BlobGoal(Goal):
         if 0 <= pos[0] - 1 < len(board) and 0 <= pos[1] < len(
                 board) and visited[pos[0] - 1][pos[1]] == -1:
 
-            if board[pos[0] - 1][pos[1]] == self.colour:
+            if board[pos[0] - 1][pos[1]] == target:
                 count = count + self._undiscovered_blob_size((pos[0] - 1,
                                                               pos[1]),
                                                              board, visited)
@@ -240,7 +470,7 @@ class BlobGoal(Goal):
         if 0 <= pos[0] + 1 < len(board) and 0 <= pos[1] < len(
                 board) and visited[pos[0] + 1][pos[1]] == -1:
 
-            if board[pos[0] + 1][pos[1]] == self.colour:
+            if board[pos[0] + 1][pos[1]] == target:
                 count = count + self._undiscovered_blob_size((pos[0] + 1,
                                                               pos[1]),
                                                              board, visited)
@@ -251,7 +481,7 @@ class BlobGoal(Goal):
         if 0 <= pos[0] < len(board) and 0 <= pos[1] - 1 < len(
                 board) and visited[pos[0]][pos[1] - 1] == -1:
 
-            if board[pos[0]][pos[1] - 1] == self.colour:
+            if board[pos[0]][pos[1] - 1] == target:
                 count = count + self._undiscovered_blob_size((pos[0],
                                                               pos[1] - 1),
                                                              board, visited)
@@ -262,7 +492,7 @@ class BlobGoal(Goal):
         if 0 <= pos[0] < len(board) and 0 <= pos[1] + 1 < len(
                 board) and visited[pos[0]][pos[1] + 1] == -1:
 
-            if board[pos[0]][pos[1] + 1] == self.colour:
+            if board[pos[0]][pos[1] + 1] == target:
                 count = count + self._undiscovered_blob_size((pos[0],
                                                               pos[1] + 1),
                                                              board, visited)
@@ -286,7 +516,7 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'block', 'settings',
-            'math', '__future__'
+            'math', '__future__', 'numpy'
         ],
         'max-attributes': 15
     })
@@ -0,0 +1,78 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for goal.py, checking that the blobs BlobGoal
+updates after a move are the blobs found on the new board from scratch.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from block import generate_board
+from board_helpers import random_path
+from goal import _Blobs, _flatten_indices
+from moves import BLOCK_ACTIONS
+from settings import COLOUR_LIST
+
+
+def _assert_same_blobs(blobs: _Blobs, fresh: _Blobs) -> None:
+    """Assert that <blobs> and <fresh> split the same grid into the same
+    blobs, with the same sizes and colours, whatever their labels.
+    """
+    assert np.array_equal(blobs.grid, fresh.grid)
+    # The labels of the two must match one to one
+    pairs = set(zip(blobs.labels.ravel().tolist(),
+                    fresh.labels.ravel().tolist()))
+    assert len({label for label, _ in pairs}) == len(pairs)
+    assert len({label for _, label in pairs}) == len(pairs)
+    assert np.array_equal(blobs.sizes[blobs.labels],
+                          fresh.sizes[fresh.labels])
+    assert np.array_equal(blobs.colours[blobs.labels], blobs.grid)
+    for colour in range(len(COLOUR_LIST)):
+        assert blobs.largest(colour) == fresh.largest(colour)
+
+
+def test_updated_blobs_match_fresh(seed: int) -> None:
+    """Test that updating the blobs after each move of a random game gives
+    the same blobs as labelling the new board from scratch, for every kind
+    of move.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    board = generate_board(rng.randint(2, 5), 750)
+    blobs = _Blobs(_flatten_indices(board))
+    for action in BLOCK_ACTIONS * 5:
+        # Paints and combines only apply to the smallest blocks
+        if action[0] in ('paint', 'combine'):
+            path = random_path(board, rng, 1)
+            path = path[:-1] if action[0] == 'combine' else path
+        else:
+            path = random_path(board, rng, 0.8)
+        board.descendant(path).apply_action(action, rng.choice(COLOUR_LIST))
+        grid = _flatten_indices(board)
+        blobs = blobs.updated(grid)
+        _assert_same_blobs(blobs, _Blobs(grid))
+
+
+if __name__ == '__main__':
+    pytest.main(['goal_test.py'])
@@ -0,0 +1,680 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the LinearBlock class, an alternative to Block that stores
+the whole quadtree of a board in one flat array instead of one Python object
+per block.
+
+Every possible block of the board has a fixed slot in the array. The slots are
+grouped by level, and within a level they are ordered so that the children of
+the block in slot m are in slots 4m, 4m + 1, 4m + 2 and 4m + 3 of the next
+level, in the same order as Block.children. Each slot holds one byte: the index
+of the block's colour in COLOUR_LIST, or a marker saying the block is
+subdivided or does not exist.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+import random
+import math
+
+from block import Block
+from settings import COLOUR_INDEX, COLOUR_LIST
+
+# Marks a block that has four children
+_INTERNAL = 254
+# Marks a slot that holds no block (its ancestor is a leaf), or a block
+# without a colour
+_EMPTY = 255
+
+# Maps (quarter turns clockwise, number of levels) to the permutation of the
+# slots of a subtree level that rotates it
+_ROTATIONS: Dict[Tuple[int, int], List[int]] = {}
+
+# The new order of the four children after a horizontal or vertical swap
+_SWAPS = {0: (1, 0, 3, 2), 1: (3, 2, 1, 0)}
+
+# The (column, row) of the quadrant of each child, in halves of its parent
+_QUADRANT_OFFSETS = ((1, 0), (0, 0), (0, 1), (1, 1))
+
+
+def _offset(depth: int) -> int:
+    """Return the index of the first slot at <depth> levels below the root of
+    a tree.
+    """
+    return (4 ** depth - 1) // 3
+
+
+def _rotation(turns: int, depth: int) -> List[int]:
+    """Return the permutation that rotates, by <turns> clockwise quarter turns,
+    the slots <depth> levels below a block.
+
+    Slot i of the rotated level is slot perm[i] of the original level.
+    """
+    key = (turns, depth)
+    if key not in _ROTATIONS:
+        if depth == 0:
+            _ROTATIONS[key] = [0]
+        else:
+            _ROTATIONS[key] = [4 * parent + (digit + turns) % 4
+                               for parent in _rotation(turns, depth - 1)
+                               for digit in range(4)]
+    return _ROTATIONS[key]
+
+
+def _cell(code: int, depth: int) -> Tuple[int, int]:
+    """Return the (column, row) of the block in slot <code> at <depth> levels
+    below the root of a tree, in units of the size of that block.
+    """
+    column = row = 0
+    for shift in range(2 * (depth - 1), -1, -2):
+        dx, dy = _QUADRANT_OFFSETS[(code >> shift) & 3]
+        column = 2 * column + dx
+        row = 2 * row + dy
+    return column, row
+
+
+def _majority(values: bytes) -> Optional[int]:
+    """Return the value that occurs in <values> more often than any other, or
+    None if there is a tie.
+    """
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    maximum = max(counts.values())
+    majority = [value for value in counts if counts[value] == maximum]
+    if len(majority) > 1:
+        return None
+    return majority[0]
+
+
+def generate_linear_board(max_depth: int, size: int) -> LinearBlock:
+    """Return a new game board with a depth of <max_depth> and dimensions of
+    <size> by <size>.
+
+    Given the same random state, this produces the same board as
+    block.generate_board.
+
+    >>> board = generate_linear_board(3, 750)
+    >>> board.max_depth
+    3
+    >>> len(board.children) == 4
+    True
+    """
+    board = LinearBlock((0, 0), size, random.choice(COLOUR_LIST), 0,
+                        max_depth)
+    board.smash()
+
+    return board
+
+
+class _LinearTree:
+    """The storage shared by all of the LinearBlocks of one board.
+
+    === Public Attributes ===
+    position:
+        The (x, y) coordinates of the upper left corner of the root.
+    level:
+        The level of the root.
+    max_depth:
+        The deepest level allowed in the tree.
+    nodes:
+        One byte per slot, as described in the module docstring.
+    sizes:
+        The size of the blocks at each depth below the root, starting with
+        the size of the root itself.
+    """
+    position: Tuple[int, int]
+    level: int
+    max_depth: int
+    nodes: bytearray
+    sizes: List[int]
+
+    def __init__(self, position: Tuple[int, int], size: int, level: int,
+                 max_depth: int, nodes: bytearray) -> None:
+        """Initialize this tree with its root at <position>, <size> and
+        <level>, storing the blocks in <nodes>.
+        """
+        self.position = position
+        self.level = level
+        self.max_depth = max_depth
+        self.nodes = nodes
+        self.sizes = [size]
+        for _ in range(max_depth - level):
+            self.sizes.append(round(self.sizes[-1] / 2.0))
+
+
+class LinearBlock:
+    """A square block in the Blocky game, stored in a flat array.
+
+    A LinearBlock is a lightweight view of one slot of a shared array, and
+    supports the same attributes and operations as Block. Changes made through
+    one LinearBlock are visible through every other LinearBlock of the same
+    board; create_copy is the only way to get an independent board.
+
+    === Public Attributes ===
+    position:
+        The (x, y) coordinates of the upper left corner of this block.
+    size:
+        The height and width of this square block.
+    colour:
+        If this block is not subdivided, <colour> stores its colour. Otherwise,
+        <colour> is None.
+    level:
+        The level of this block within the overall block structure.
+    max_depth:
+        The deepest level allowed in the overall block structure.
+    children:
+        A new list of the blocks into which this block is subdivided, in the
+        same order as Block.children.
+    """
+    # === Private Attributes ===
+    # _tree:
+    #   The storage of the board this block belongs to.
+    # _depth:
+    #   The number of levels between this block and the root of _tree.
+    # _code:
+    #   The position of this block's slot within its level.
+    _tree: _LinearTree
+    _depth: int
+    _code: int
+
+    def __init__(self, position: Tuple[int, int], size: int,
+                 colour: Optional[Tuple[int, int, int]], level: int,
+                 max_depth: int) -> None:
+        """Initialize this block as the root of a new board, with <position>,
+        dimensions <size> by <size>, the given <colour>, at <level>, and with
+        no children.
+
+        Preconditions:
+            - position[0] >= 0 and position[1] >= 0
+            - size > 0
+            - level >= 0
+            - max_depth >= level
+            - colour is None or colour in COLOUR_LIST
+        """
+        nodes = bytearray([_EMPTY]) * _offset(max_depth - level + 1)
+        if colour is not None:
+            nodes[0] = COLOUR_INDEX[colour]
+        self._tree = _LinearTree(position, size, level, max_depth, nodes)
+        self._depth = 0
+        self._code = 0
+
+    @staticmethod
+    def _view(tree: _LinearTree, depth: int, code: int) -> LinearBlock:
+        """Return a LinearBlock for slot <code> at <depth> levels below the
+        root of <tree>.
+        """
+        block = LinearBlock.__new__(LinearBlock)
+        block._tree = tree
+        block._depth = depth
+        block._code = code
+        return block
+
+    @staticmethod
+    def from_block(block: Block) -> LinearBlock:
+        """Return a new LinearBlock board that is equivalent to <block>.
+        """
+        result = LinearBlock(block.position, block.size, block.colour,
+                             block.level, block.max_depth)
+        nodes = result._tree.nodes
+        # Walk <block> one level at a time, keeping the slot of each block
+        frontier = [(block, 0)]
+        depth = 0
+        while frontier:
+            next_frontier = []
+            for b, code in frontier:
+                if b.children:
+                    nodes[_offset(depth) + code] = _INTERNAL
+                    for i, child in enumerate(b.children):
+                        next_frontier.append((child, 4 * code + i))
+                elif b.colour is not None:
+                    nodes[_offset(depth) + code] = COLOUR_INDEX[b.colour]
+            frontier = next_frontier
+            depth += 1
+        return result
+
+    def to_block(self) -> Block:
+        """Return a new Block that is equivalent to this block.
+        """
+        block = Block(self.position, self.size, self.colour, self.level,
+                      self.max_depth)
+        block.children = [child.to_block() for child in self.children]
+        return block
+
+    @property
+    def _index(self) -> int:
+        """The index of this block's slot in the array."""
+        return _offset(self._depth) + self._code
+
+    @property
+    def level(self) -> int:
+        """The level of this block."""
+        return self._tree.level + self._depth
+
+    @property
+    def max_depth(self) -> int:
+        """The deepest level allowed in this block's board."""
+        return self._tree.max_depth
+
+    @property
+    def size(self) -> int:
+        """The height and width of this block."""
+        return self._tree.sizes[self._depth]
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The (x, y) coordinates of the upper left corner of this block."""
+        x, y = self._tree.position
+        for depth in range(1, self._depth + 1):
+            digit = (self._code >> (2 * (self._depth - depth))) & 3
+            size = self._tree.sizes[depth]
+            if digit in (0, 3):
+                x += size
+            if digit in (2, 3):
+                y += size
+        return x, y
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this block, or None if it is subdivided."""
+        value = self._tree.nodes[self._index]
+        if value >= _INTERNAL:
+            return None
+        return COLOUR_LIST[value]
+
+    @property
+    def children(self) -> List[LinearBlock]:
+        """The four children of this block, or [] if it is not subdivided."""
+        if self._tree.nodes[self._index] != _INTERNAL:
+            return []
+        return [LinearBlock._view(self._tree, self._depth + 1,
+                                  4 * self._code + i) for i in range(4)]
+
+    def __str__(self) -> str:
+        """Return this block in the same string format as Block.
+        """
+        return str(self.to_block())
+
+    def __eq__(self, other: object) -> bool:
+        """Return True iff this block and all its descendants are equivalent
+        to the <other> block and all its descendants.
+
+        <other> may be a LinearBlock or a Block.
+        """
+        if isinstance(other, LinearBlock):
+            return self.position == other.position and \
+                   self.size == other.size and \
+                   self.level == other.level and \
+                   self.max_depth == other.max_depth and \
+                   self._subtree() == other._subtree()
+        return self.to_block() == other
+
+    def _subtree(self) -> bytearray:
+        """Return the slots of this block and all its descendants, level by
+        level.
+        """
+        nodes = self._tree.nodes
+        result = bytearray()
+        for depth in range(self.max_depth - self.level + 1):
+            start = _offset(self._depth + depth) + self._code * 4 ** depth
+            result += nodes[start:start + 4 ** depth]
+        return result
+
+    def _level_slots(self, depth: int) -> Tuple[int, int]:
+        """Return the index of the first slot of the blocks <depth> levels
+        below this block, and the number of those slots.
+        """
+        return _offset(self._depth + depth) + self._code * 4 ** depth, \
+            4 ** depth
+
+    def descendant(self, path: List[int]) -> LinearBlock:
+        """Return the descendant of this block that is reached by following
+        the child indices in <path>, in order.
+
+        Precondition: every index in <path> refers to an existing child.
+        """
+        block = self
+        for i in path:
+            block = block.children[i]
+        return block
+
+    def locate_path(self, location: Tuple[int, int],
+                    level: int) -> Optional[List[int]]:
+        """Return the child indices that lead from this block to the block
+        at <level> that includes <location>, as described in
+        Block.locate_path.
+        """
+        x, y = self.position
+        if not (x <= location[0] < x + self.size and
+                y <= location[1] < y + self.size):
+            return None
+
+        path = []
+        block = self
+        while block.level < level and block.children:
+            half = self._tree.sizes[block._depth + 1]
+            right = location[0] >= x + half
+            bottom = location[1] >= y + half
+            if right:
+                x += half
+            if bottom:
+                y += half
+            i = _QUADRANT_OFFSETS.index((int(right), int(bottom)))
+            path.append(i)
+            block = block.children[i]
+        return path
+
+    def locate(self, location: Tuple[int, int],
+               level: int) -> Optional[LinearBlock]:
+        """Return the block within this block that is at <level> and includes
+        <location>, as described in Block.locate_path.
+
+        Return None if this block does not include <location>.
+        """
+        path = self.locate_path(location, level)
+        if path is None:
+            return None
+        return self.descendant(path)
+
+    def leaf_cells(self) -> \
+            Iterator[Tuple[int, int, int, Tuple[int, int, int]]]:
+        """Yield a tuple (column, row, width, colour) for every leaf in this
+        block's subtree, as described in Block.leaf_cells.
+        """
+        nodes = self._tree.nodes
+        for depth in range(self.max_depth - self.level + 1):
+            width = 2 ** (self.max_depth - self.level - depth)
+            start, count = self._level_slots(depth)
+            for code, value in enumerate(nodes[start:start + count]):
+                if value < _INTERNAL:
+                    column, row = _cell(code, depth)
+                    yield column * width, row * width, width, \
+                        COLOUR_LIST[value]
+
+    def colour_areas(self) -> Tuple[int, ...]:
+        """Return the number of unit cells in this block in each colour of
+        COLOUR_LIST, in the same order.
+        """
+        areas = [0] * len(COLOUR_LIST)
+        for _, _, width, colour in self.leaf_cells():
+            areas[COLOUR_INDEX[colour]] += width * width
+        return tuple(areas)
+
+    def edge_counts(self, side: int) -> Tuple[int, ...]:
+        """Return the number of unit cells along <side> of this block in each
+        colour of COLOUR_LIST, in the same order. <side> is 0, 1, 2 or 3 for
+        the top, right, bottom and left side.
+        """
+        total = 2 ** (self.max_depth - self.level)
+        counts = [0] * len(COLOUR_LIST)
+        for column, row, width, colour in self.leaf_cells():
+            if (side == 0 and row == 0) or \
+                    (side == 1 and column + width == total) or \
+                    (side == 2 and row + width == total) or \
+                    (side == 3 and column == 0):
+                counts[COLOUR_INDEX[colour]] += width
+        return tuple(counts)
+
+    def zobrist_hash(self) -> int:
+        """Return the same hash as Block.zobrist_hash does for an equivalent
+        Block.
+        """
+        return self.to_block().zobrist_hash()
+
+    def smashable(self) -> bool:
+        """Return True iff this block can be smashed.
+
+        A block can be smashed if it has no children and its level is not at
+        max_depth.
+        """
+        return self.level != self.max_depth and \
+            self._tree.nodes[self._index] != _INTERNAL
+
+    def combinable(self) -> bool:
+        """Return True iff this block can be combined.
+
+        A block can be combined if it is at level max_depth - 1, has children,
+        and a strict majority of its children have the same colour.
+        """
+        if self.level != self.max_depth - 1 or \
+                self._tree.nodes[self._index] != _INTERNAL:
+            return False
+        first = _offset(self._depth + 1) + 4 * self._code
+        return _majority(self._tree.nodes[first:first + 4]) is not None
+
+    def paintable(self, colour: Tuple[int, int, int]) -> bool:
+        """Return True iff this block can be painted <colour>.
+
+        A block can be painted if it is a leaf at max_depth whose colour is not
+        already <colour>.
+        """
+        return self.level == self.max_depth and self.colour is not None and \
+            self.colour != colour
+
+    def legal_count(self, action: Tuple[str, Optional[int]],
+                    colour: Tuple[int, int, int]) -> int:
+        """Return the number of blocks in this block's subtree (including this
+        block) on which <action> can be performed, painting with <colour>, as
+        described in Block.legal_count.
+        """
+        counts = self._legal_counts()
+        name = action[0]
+        if name in ('rotate', 'swap'):
+            return counts[0]
+        elif name == 'smash':
+            return counts[1]
+        elif name == 'combine':
+            return counts[2]
+        elif name == 'paint':
+            if colour in COLOUR_INDEX:
+                return counts[3] - counts[4 + COLOUR_INDEX[colour]]
+            return counts[3]
+        return 0
+
+    def _legal_counts(self) -> Tuple[int, ...]:
+        """Return the number of blocks in this block's subtree that can be
+        rotated and swapped, smashed and combined, followed by the number of
+        leaves at max_depth and the number of those in each colour of
+        COLOUR_LIST.
+        """
+        nodes = self._tree.nodes
+        counts = [0] * (4 + len(COLOUR_LIST))
+        for depth in range(self.max_depth - self.level + 1):
+            level = self.level + depth
+            start, count = self._level_slots(depth)
+            for code, value in enumerate(nodes[start:start + count]):
+                if value == _INTERNAL:
+                    counts[0] += 1
+                    if level == self.max_depth - 1:
+                        first = self._level_slots(depth + 1)[0] + 4 * code
+                        counts[2] += int(
+                            _majority(nodes[first:first + 4]) is not None)
+                elif value == _EMPTY:
+                    continue
+                elif level < self.max_depth:
+                    counts[1] += 1
+                else:
+                    counts[3] += 1
+                    counts[4 + value] += 1
+        return tuple(counts)
+
+    def smash(self) -> bool:
+        """Sub-divide this block so that it has four randomly generated
+        children.
+
+        If this block's level is <max_depth>, do nothing. If this block has
+        children, do nothing.
+
+        Return True iff the smash was performed.
+        """
+        if not self.smashable():
+            return False
+
+        nodes = self._tree.nodes
+        nodes[self._index] = _INTERNAL
+        first = _offset(self._depth + 1) + 4 * self._code
+        for i in range(4):
+            nodes[first + i] = random.randint(0, len(COLOUR_LIST) - 1)
+        for child in self.children:
+            number = random.random()
+            if number < math.exp(-0.25 * child.level) and child.smashable():
+                child.smash()
+        return True
+
+    def swap(self, direction: int) -> bool:
+        """Swap the child blocks of this block.
+
+        If this block has no children, do nothing. Otherwise, if <direction> is
+        1, swap vertically. If <direction> is 0, swap horizontally.
+
+        Return True iff the swap was performed.
+
+        Precondition: <direction> is either 0 or 1
+        """
+        nodes = self._tree.nodes
+        if nodes[self._index] != _INTERNAL:
+            return False
+
+        order = _SWAPS[direction]
+        for depth in range(1, self.max_depth - self.level + 1):
+            span = 4 ** (depth - 1)
+            start = _offset(self._depth + depth) + self._code * 4 * span
+            quarters = [nodes[start + i * span:start + (i + 1) * span]
+                        for i in range(4)]
+            nodes[start:start + 4 * span] = b''.join(quarters[i]
+                                                     for i in order)
+        return True
+
+    def rotate(self, direction: int) -> bool:
+        """Rotate this block and all its descendants.
+
+        If this block has no children, do nothing. If <direction> is 1, rotate
+        clockwise. If <direction> is 3, rotate counter-clockwise.
+
+        Return True iff the rotate was performed.
+
+        Precondition: <direction> is either 1 or 3.
+        """
+        nodes = self._tree.nodes
+        if nodes[self._index] != _INTERNAL:
+            return False
+
+        turns = 1 if direction == 1 else 3
+        for depth in range(1, self.max_depth - self.level + 1):
+            start = _offset(self._depth + depth) + self._code * 4 ** depth
+            level_slots = nodes[start:start + 4 ** depth]
+            nodes[start:start + 4 ** depth] = bytes(
+                map(level_slots.__getitem__, _rotation(turns, depth)))
+        return True
+
+    def paint(self, colour: Tuple[int, int, int]) -> bool:
+        """Change this block's colour iff it is a leaf at a level of max_depth
+        and its colour is different from <colour>.
+
+        Return True iff this block's colour was changed.
+        """
+        nodes = self._tree.nodes
+        value = COLOUR_INDEX[colour]
+        if self.level != self.max_depth or nodes[self._index] >= _INTERNAL \
+                or nodes[self._index] == value:
+            return False
+        nodes[self._index] = value
+        return True
+
+    def combine(self) -> bool:
+        """Turn this block into a leaf based on the majority colour of its
+        children.
+
+        A tie does not constitute a majority. If there is no majority colour,
+        do nothing. If this block is not at a level of max_depth - 1, or this
+        block has no children, do nothing.
+
+        Return True iff this block was turned into a leaf node.
+        """
+        nodes = self._tree.nodes
+        if self.level != self.max_depth - 1 or \
+                nodes[self._index] != _INTERNAL:
+            return False
+
+        first = _offset(self._depth + 1) + 4 * self._code
+        majority = _majority(nodes[first:first + 4])
+        if majority is None:
+            return False
+
+        nodes[self._index] = majority
+        nodes[first:first + 4] = bytes([_EMPTY]) * 4
+        return True
+
+    def create_copy(self) -> LinearBlock:
+        """Return a new LinearBlock that is a deep copy of this block, on a
+        board of its own.
+        """
+        tree = _LinearTree(self.position, self.size, self.level,
+                           self.max_depth, self._subtree())
+        return LinearBlock._view(tree, 0, 0)
+
+    def branch(self, path: List[int]) -> Tuple[LinearBlock, LinearBlock]:
+        """Return a new board that is equivalent to this block, and the block
+        at <path> in the new board, as Block.branch does.
+
+        The new board is a full copy, so this takes time and space linear in
+        the number of slots.
+
+        Precondition: every index in <path> refers to an existing child.
+        """
+        board = self.create_copy()
+        return board, board.descendant(path)
+
+    def apply_action(self, action: Tuple[str, Optional[int]],
+                     colour: Tuple[int, int, int]) -> bool:
+        """Perform <action> on this block, painting it <colour> if <action> is
+        a paint, as Block.apply_action does.
+
+        Return True iff the action was performed. LinearBlock does not keep
+        undo records.
+        """
+        name, direction = action
+        if name == 'rotate':
+            return self.rotate(direction)
+        elif name == 'swap':
+            return self.swap(direction)
+        elif name == 'smash':
+            return self.smash()
+        elif name == 'combine':
+            return self.combine()
+        elif name == 'paint':
+            return self.paint(colour)
+        return name == 'pass'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'block', 'settings'
+        ],
+        'max-attributes': 15,
+        'max-args': 6
+    })
@@ -0,0 +1,110 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for linear_block.py, checking that a LinearBlock
+board can be used wherever a Block board is: by the goals, the move helpers
+and the computer players.
+"""
+import random
+from typing import Tuple
+
+import pytest
+
+from block import Block, generate_board
+from board_helpers import block_paths
+from goal import BlobGoal, PerimeterGoal
+from linear_block import LinearBlock, generate_linear_board
+from moves import BLOCK_ACTIONS
+from player import RandomPlayer, SmartPlayer
+from settings import COLOUR_LIST
+
+
+def _boards(seed: int) -> Tuple[Block, LinearBlock]:
+    """Return a random Block board and the equivalent LinearBlock board.
+    """
+    depth = random.Random(seed).randint(1, 5)
+    random.seed(seed)
+    board = generate_board(depth, 750)
+    random.seed(seed)
+    linear = generate_linear_board(depth, 750)
+    return board, linear
+
+
+def test_summaries_match_block(seed: int) -> None:
+    """Test that a LinearBlock board summarises itself like the equivalent
+    Block board, before and after some moves.
+    """
+    board, linear = _boards(seed)
+    rng = random.Random(seed)
+    for _ in range(5):
+        assert linear == board
+        assert linear.zobrist_hash() == board.zobrist_hash()
+        for path in block_paths(board):
+            block = board.descendant(path)
+            other = linear.descendant(path)
+            assert sorted(other.leaf_cells()) == sorted(block.leaf_cells())
+            assert other.colour_areas() == block.colour_areas()
+            for side in range(4):
+                assert other.edge_counts(side) == block.edge_counts(side)
+            assert other.combinable() == block.combinable()
+            for colour in COLOUR_LIST:
+                assert other.paintable(colour) == block.paintable(colour)
+                for action in BLOCK_ACTIONS:
+                    assert other.legal_count(action, colour) == \
+                        block.legal_count(action, colour)
+
+        path = rng.choice(block_paths(board))
+        action = rng.choice(BLOCK_ACTIONS)
+        colour = rng.choice(COLOUR_LIST)
+        state = random.getstate()
+        done = board.descendant(path).apply_action(action, colour)
+        random.setstate(state)
+        assert linear.descendant(path).apply_action(action, colour) == done
+
+
+def test_goals_score_linear_board(seed: int) -> None:
+    """Test that the goals give a LinearBlock board the same scores as the
+    equivalent Block board.
+    """
+    board, linear = _boards(seed)
+    for colour in COLOUR_LIST:
+        for goal in (PerimeterGoal(colour), BlobGoal(colour)):
+            assert goal.score(linear) == goal.score(board)
+
+
+def test_players_move_on_linear_board(seed: int) -> None:
+    """Test that computer players choose valid moves on a LinearBlock board.
+    """
+    _, linear = _boards(seed)
+    colour = COLOUR_LIST[seed % len(COLOUR_LIST)]
+    for player in (RandomPlayer(0, BlobGoal(colour)),
+                   SmartPlayer(1, PerimeterGoal(colour), 5)):
+        action, direction, block = player.choose_move(linear)
+        assert isinstance(block, LinearBlock)
+        path = linear.locate_path(block.position, block.level)
+        assert linear.descendant(path) == block
+        assert action == 'pass' or \
+            block.apply_action((action, direction), colour)
+
+
+if __name__ == '__main__':
+    pytest.main(['linear_block_test.py'])
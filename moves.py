@@ -0,0 +1,133 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains functions that find the legal moves on a board, using the
+counts of legal blocks that every Block keeps for its subtree (see
+Block.legal_count).
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+import random
+
+from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, COMBINE, PAINT
+from block import Block
+
+# Every action that is performed on a block, i.e. every action but PASS
+BLOCK_ACTIONS = [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, SWAP_HORIZONTAL,
+                 SWAP_VERTICAL, SMASH, COMBINE, PAINT]
+
+
+def is_legal(block: Block, action: Tuple[str, Optional[int]],
+             colour: Tuple[int, int, int]) -> bool:
+    """Return True iff <action> can be performed on <block>, painting with
+    <colour>.
+
+    Precondition: action in BLOCK_ACTIONS
+    """
+    if action[0] in ('rotate', 'swap'):
+        return len(block.children) > 0
+    elif action == SMASH:
+        return block.smashable()
+    elif action == COMBINE:
+        return block.combinable()
+    else:
+        return block.paintable(colour)
+
+
+def legal_moves(board: Block, colour: Tuple[int, int, int]) -> \
+        Iterator[Tuple[str, Optional[int], Block]]:
+    """Yield every valid move on <board> for a player whose goal is <colour>.
+
+    A valid move is a move other than PASS that can be successfully performed
+    on <board>. Subtrees without any block a given action can be performed on
+    are skipped.
+    """
+    actions = [action for action in BLOCK_ACTIONS
+               if board.legal_count(action, colour) > 0]
+    if not actions:
+        return
+    for action in actions:
+        if is_legal(board, action, colour):
+            yield action + (board,)
+    for child in board.children:
+        yield from legal_moves(child, colour)
+
+
+def random_legal_path(board: Block, colour: Tuple[int, int, int]) -> \
+        Optional[Tuple[Tuple[str, Optional[int]], List[int]]]:
+    """Return a random valid action on <board> for a player whose goal is
+    <colour>, and the path of child indices to the block it is performed on.
+
+    The action is chosen uniformly from the actions that can be performed on
+    at least one block, then the block is chosen uniformly from the blocks it
+    can be performed on. This takes O(max_depth) time.
+
+    Return None if there is no valid move.
+    """
+    actions = [action for action in BLOCK_ACTIONS
+               if board.legal_count(action, colour) > 0]
+    if not actions:
+        return None
+
+    action = random.choice(actions)
+    path = []
+    block = board
+    while True:
+        # Choose this block or one of its children, weighted by how many
+        # blocks in each the action can be performed on
+        pick = random.randrange(block.legal_count(action, colour))
+        if is_legal(block, action, colour):
+            if pick == 0:
+                return action, path
+            pick -= 1
+        for i, child in enumerate(block.children):
+            count = child.legal_count(action, colour)
+            if pick < count:
+                path.append(i)
+                block = child
+                break
+            pick -= count
+
+
+def random_legal_move(board: Block, colour: Tuple[int, int, int]) -> \
+        Optional[Tuple[str, Optional[int], Block]]:
+    """Return a random valid move on <board> for a player whose goal is
+    <colour>, chosen as described in random_legal_path.
+
+    Return None if there is no valid move.
+    """
+    choice = random_legal_path(board, colour)
+    if choice is None:
+        return None
+    action, path = choice
+    return action + (board.descendant(path),)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__',
+            'actions', 'block'
+        ],
+        'generated-members': 'pygame.*'
+    })
@@ -0,0 +1,98 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for moves.py, checking the legal moves it finds
+from the cached legality counts against trying every action on every block.
+"""
+import random
+from typing import List, Set, Tuple
+
+import pytest
+
+from block import Block, generate_board
+from board_helpers import block_paths, random_path
+from moves import BLOCK_ACTIONS, legal_moves, random_legal_path
+from settings import COLOUR_LIST
+
+
+def _brute_force(board: Block, colour: Tuple[int, int, int]) -> \
+        Set[Tuple[Tuple[str, int], Tuple[int, ...]]]:
+    """Return every action that can be performed on <board>, painting with
+    <colour>, with the path to the block it is performed on, found by
+    performing each action on each block of a copy of <board>.
+    """
+    moves = set()
+    for path in block_paths(board):
+        for action in BLOCK_ACTIONS:
+            if board.create_copy().descendant(path).apply_action(action,
+                                                                 colour):
+                moves.add((action, tuple(path)))
+    return moves
+
+
+def _random_board(seed: int) -> Tuple[Block, Tuple[int, int, int]]:
+    """Return a random board that has had some random moves made on it, and
+    a random colour to paint with.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    board = generate_board(rng.randint(0, 3), 750)
+    for _ in range(5):
+        block = board.descendant(random_path(board, rng))
+        block.apply_action(rng.choice(BLOCK_ACTIONS), rng.choice(COLOUR_LIST))
+    return board, rng.choice(COLOUR_LIST)
+
+
+def _path(board: Block, block: Block) -> List[int]:
+    """Return the path from <board> to <block>, one of its blocks.
+    """
+    return board.locate_path(block.position, block.level)
+
+
+def test_legal_moves_match_brute_force(seed: int) -> None:
+    """Test that legal_moves yields every move that can be performed on the
+    board, and only those, each once.
+    """
+    board, colour = _random_board(seed)
+    found = [((name, direction), tuple(_path(board, block)))
+             for name, direction, block in legal_moves(board, colour)]
+    assert len(found) == len(set(found))
+    assert set(found) == _brute_force(board, colour)
+
+
+def test_random_legal_path_finds_every_move(seed: int) -> None:
+    """Test that random_legal_path only chooses moves that can be performed,
+    chooses each of them eventually, and returns None when there is none.
+    """
+    board, colour = _random_board(seed)
+    expected = _brute_force(board, colour)
+    chosen = set()
+    for _ in range(50 * len(expected) + 1):
+        choice = random_legal_path(board, colour)
+        if choice is None:
+            break
+        chosen.add((choice[0], tuple(choice[1])))
+    assert chosen == expected
+
+
+if __name__ == '__main__':
+    pytest.main(['moves_test.py'])
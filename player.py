@@ -22,32 +22,49 @@ Misha Schwartz, and Jaisie Sin.
 This file contains the hierarchy of player classes.
 """
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import atexit
+import math
+import multiprocessing
 import random
+import threading
+import time
 import pygame
 
 from block import Block
-from goalsepehr import Goal, generate_goals
+from goal import Goal, generate_goals
+from linear_block import LinearBlock
+from transposition import TranspositionTable
 
-from actions import KEY_ACTION, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
-    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+from actions import ACTION_PENALTY, KEY_ACTION, PASS
+from settings import COLOUR_LIST
+from moves import is_legal, random_legal_move, random_legal_path
 
 
-def create_players(num_human: int, num_random: int, smart_players: List[int]) \
+def create_players(num_human: int, num_random: int, smart_players: List[int],
+                   mcts_players: Optional[List[float]] = None) \
         -> List[Player]:
     """Return a new list of Player objects.
 
     <num_human> is the number of human player, <num_random> is the number of
     random players, and <smart_players> is a list of difficulty levels for each
-    SmartPlayer that is to be created.
+    SmartPlayer that is to be created. <mcts_players>, if given, is a list of
+    the number of seconds each MCTSPlayer that is to be created may think
+    about each move.
 
     The list should contain <num_human> HumanPlayer objects first, then
     <num_random> RandomPlayer objects, then the same number of SmartPlayer
-    objects as the length of <smart_players>. The difficulty levels in
-    <smart_players> should be applied to each SmartPlayer object, in order.
+    objects as the length of <smart_players>, then the same number of
+    MCTSPlayer objects as the length of <mcts_players>. The difficulty levels
+    in <smart_players> and the times in <mcts_players> should be applied to
+    each SmartPlayer and MCTSPlayer object, in order.
     """
     # TODO: Implement Me
-    goals = generate_goals(num_human + num_random + len(smart_players))
+    if mcts_players is None:
+        mcts_players = []
+    num_players = num_human + num_random + len(smart_players) + \
+        len(mcts_players)
+    goals = generate_goals(num_players)
     player_list = []
     for i in range(num_human):
         player_list.append(HumanPlayer(i, goals[i]))
@@ -58,9 +75,104 @@ def create_players(num_human: int, num_random: int, smart_players: List[int]) \
         player_list.append(SmartPlayer(i, goals[i],
                                        smart_players[i - num_human -
                                                      num_random]))
+    for i, budget in enumerate(mcts_players,
+                               num_players - len(mcts_players)):
+        player_list.append(MCTSPlayer(i, goals[i], budget, num_players))
     return player_list
 
 
+# A description of a computer player: its kind ('random', 'smart', 'timed'
+# or 'mcts') and the difficulty to give it, which is ignored for random
+# players and is the number of milliseconds to think about each move for
+# timed smart players and MCTS players
+PlayerConfig = Tuple[str, int]
+
+
+def make_player(config: PlayerConfig, player_id: int, goal: Goal) -> Player:
+    """Return a new computer player described by <config>, with <player_id>
+    and <goal>.
+
+    Raise a ValueError if the kind of player in <config> is unknown.
+    """
+    kind, difficulty = config
+    if kind == 'random':
+        return RandomPlayer(player_id, goal)
+    elif kind == 'smart':
+        return SmartPlayer(player_id, goal, difficulty)
+    elif kind == 'timed':
+        return SmartPlayer(player_id, goal, 0, time_limit=difficulty / 1000)
+    elif kind == 'mcts':
+        return MCTSPlayer(player_id, goal, difficulty / 1000)
+    raise ValueError(f'Unknown kind of player: {kind}')
+
+
+# The number of candidate moves in each job given to a worker process. Jobs
+# do not depend on the number of processes, so neither do the moves chosen.
+_CANDIDATES_PER_JOB = 8
+
+# The worker pools of SmartPlayers, keyed by their number of processes, kept
+# from one move to the next
+_POOLS = {}
+
+# A job for a worker process: a board, a goal, a number of candidate moves to
+# try, and the seed for the random number generator
+_CandidateJob = Tuple[LinearBlock, Goal, int, int]
+# A candidate move found by a worker process: an action, the path of child
+# indices to the block it is performed on, and the goal's score afterwards
+_Candidate = Tuple[Tuple[str, Optional[int]], List[int], int]
+
+
+def _worker_pool(processes: int) -> multiprocessing.pool.Pool:
+    """Return the pool of <processes> worker processes, starting it if
+    necessary.
+    """
+    if processes not in _POOLS:
+        _POOLS[processes] = multiprocessing.Pool(processes)
+    return _POOLS[processes]
+
+
+def _stopped(cancel: Optional[threading.Event]) -> bool:
+    """Return True iff <cancel> is given and has been set, i.e. the move being
+    chosen is no longer wanted.
+    """
+    return cancel is not None and cancel.is_set()
+
+
+def close_pools() -> None:
+    """Stop every worker process started by a SmartPlayer.
+
+    This is called when the interpreter exits, but can be called earlier to
+    free the workers; they are started again when next needed.
+    """
+    for pool in _POOLS.values():
+        pool.terminate()
+    _POOLS.clear()
+
+
+atexit.register(close_pools)
+
+
+def _evaluate_candidates(job: _CandidateJob) -> List[_Candidate]:
+    """Return the candidate moves for the job <job>: random valid moves on
+    its board for its goal, with the goal's score after each of them.
+
+    Fewer candidates are returned if there is no valid move.
+    """
+    linear_board, goal, count, seed = job
+    random.seed(seed)
+    board = linear_board.to_block()
+    candidates = []
+    for _ in range(count):
+        choice = random_legal_path(board, goal.colour)
+        if choice is None:
+            break
+        action, path = choice
+        trial_board, block = board.branch(path)
+        block.apply_action(action, goal.colour)
+        candidates.append((action, path, goal.score(trial_board)))
+    return candidates
+
+
 def _get_block(block: Block, location: Tuple[int, int], level: int) -> \
         Optional[Block]:
     """Return the Block within <block> that is at <level> and includes
@@ -76,24 +188,12 @@ def _get_block(block: Block, location: Tuple[int, int], level: int) -> \
 
     If no Block can be found at <location>, return None.
 
+    This takes O(max_depth) time; see Block.locate.
+
     Preconditions:
         - 0 <= level <= max_depth
     """
-    # TODO: Implement me
-    # can i import board_size
-    if block.size < location[0] < 0 or block.size < location[1] < 0 or \
-            block.level > block.max_depth:
-        # no block at location
-        return None
-    elif block.level == level and block.size >= location[0] - \
-            block.position[0] >= 0 and block.size >= location[1] - \
-            block.position[1] >= 0:
-        return block
-    else:
-        for child in block.children:
-            if _get_block(child, location, level) is not None:
-                return _get_block(child, location, level)
-        return None
+    return block.locate(location, level)
 
 
 class Player:
@@ -141,6 +241,31 @@ class Player:
         """
         raise NotImplementedError
 
+    def proceed(self) -> bool:
+        """Return True iff this player has been asked to make a move since the
+        last time it made one, and forget that it was asked.
+
+        Only a computer player can be asked to move, by a click. When this
+        returns True, the move should be found with choose_move.
+        """
+        return False
+
+    def choose_move(self, board: Block,
+                    cancel: Optional[threading.Event] = None) -> \
+            Tuple[str, Optional[int], Block]:
+        """Return the move this player would make on <board>, whether or not
+        it has been asked to move.
+
+        Only computer players can choose a move this way, so that it can be
+        done away from the game loop, e.g. on a copy of the board in a worker
+        thread. If <cancel> is set meanwhile, the move is no longer wanted,
+        and the player returns the best move it has found so far as soon as
+        it can.
+
+        This function does not mutate <board>.
+        """
+        raise NotImplementedError
+
 
 def _create_move(action: Tuple[str, Optional[int]], block: Block) -> \
         Tuple[str, Optional[int], Block]:
@@ -224,27 +349,39 @@ class HumanPlayer(Player):
             return move
 
 
-class RandomPlayer(Player):
-    """ A Player that does random moves.
+class _ComputerPlayer(Player):
+    """A player whose moves are chosen by the computer, each time it is asked
+    to move by a click.
+
+    This is an abstract class. Only child classes should be instantiated.
+
     === Public Attributes ===
     id:
         This player's number.
     goal:
         This player's assigned goal for the game.
-
     === Private Attributes ===
     _proceed:
       True when the player should make a move, False when the player should
       wait.
+    _scores:
+      The goal scores of boards this player has already evaluated, keyed by
+      their hash. Each search for a move starts a new generation of it, and
+      scores are stored with the number of moves searched below the board.
     """
     id: int
     goal: Goal
     _proceed: bool
+    _scores: TranspositionTable
 
-    def __init__(self, player_id: int, goal: Goal) -> None:
-        # TODO: Implement Me
+    def __init__(self, player_id: int, goal: Goal,
+                 capacity: int = 1 << 12) -> None:
+        """Initialize this player, remembering the scores of up to <capacity>
+        boards.
+        """
         Player.__init__(self, player_id, goal)
         self._proceed = False
+        self._scores = TranspositionTable(capacity)
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         return None
@@ -253,8 +390,59 @@ class RandomPlayer(Player):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             self._proceed = True
 
+    def proceed(self) -> bool:
+        proceed = self._proceed
+        self._proceed = False
+        return proceed
+
+    def _score(self, board: Block, depth: int = 0) -> int:
+        """Return the score for this player's goal on <board>, reusing the
+        score of any earlier board in the same state, such as one reached by
+        rotating a block clockwise and then counter-clockwise.
+
+        <depth> is the number of moves the current search looks ahead from
+        <board>, so that the scores of boards nearer the root of a search,
+        which are looked up again more often, are kept over the others.
+        """
+        key = board.zobrist_hash()
+        score = self._scores.get(key)
+        if score is None:
+            score = self.goal.score(board)
+            self._scores.store(key, score, depth)
+        return score
+
     def generate_move(self, board: Block) -> \
             Optional[Tuple[str, Optional[int], Block]]:
+        """Return the move chosen by choose_move, once this player has been
+        asked to move.
+
+        This function does not mutate <board>.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+        move = self.choose_move(board)
+        self._proceed = False  # Must set to False before returning!
+        return move
+
+
+class RandomPlayer(_ComputerPlayer):
+    """ A Player that does random moves.
+    === Public Attributes ===
+    id:
+        This player's number.
+    goal:
+        This player's assigned goal for the game.
+    """
+    id: int
+    goal: Goal
+
+    def __init__(self, player_id: int, goal: Goal) -> None:
+        # TODO: Implement Me
+        _ComputerPlayer.__init__(self, player_id, goal)
+
+    def choose_move(self, board: Block,
+                    cancel: Optional[threading.Event] = None) -> \
+            Tuple[str, Optional[int], Block]:
         """Return a valid, randomly generated move.
 
         A valid move is a move other than PASS that can be successfully
@@ -262,59 +450,16 @@ class RandomPlayer(Player):
 
         This function does not mutate <board>.
         """
-        if not self._proceed:
-            return None  # Do not remove
         # TODO: Implement Me
 
-        valid_move = False          # checker for validity
-        all_moves = [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
-                     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH,
-                     COMBINE, PAINT]
-        final_move = None
-        while not valid_move:
-            block = None
-            move_type = 0
-            while block is None:
-                block_level = random.randint(0, board.max_depth)
-                move_type = random.randint(0, len(all_moves) - 1)
-                random_x = random.randint(0, board.size)
-                random_y = random.randint(0, board.size)
-                block = _get_block(board, (random_x, random_y), block_level)
-            block_copy = block.create_copy()
-            if move_type == 0:
-                if block_copy.rotate(1):
-                    final_move = (ROTATE_CLOCKWISE + (block,))
-                    valid_move = True
-            elif move_type == 1:
-                if block_copy.rotate(3):
-                    final_move = (ROTATE_COUNTER_CLOCKWISE + (block,))
-                    valid_move = True
-            elif move_type == 2:
-                if block_copy.swap(0):
-                    final_move = (SWAP_HORIZONTAL + (block,))
-                    valid_move = True
-            elif move_type == 3:
-                if block_copy.swap(1):
-                    final_move = (SWAP_VERTICAL + (block,))
-                    valid_move = True
-            elif move_type == 4:
-                if block_copy.smash():
-                    final_move = (SMASH + (block,))
-                    valid_move = True
-            elif move_type == 5:
-                if block_copy.combine():
-                    final_move = (COMBINE + (block,))
-                    valid_move = True
-            else:  # move_type == 6:
-                if block_copy.paint(self.goal.colour):
-                    final_move = (PAINT + (block,))
-                    valid_move = True
+        final_move = random_legal_move(board, self.goal.colour)
+        if final_move is None:
+            final_move = PASS + (board,)
 
-        self._proceed = False  # Must set to False before returning!
         return final_move
 
 
-class SmartPlayer(Player):
+class SmartPlayer(_ComputerPlayer):
     """ A strategic player with a certain level of difficulty.
     === Public Attributes ===
     id:
@@ -323,96 +468,105 @@ class SmartPlayer(Player):
         This player's assigned goal for the game.
     difficulty:
         This player's difficulty level.
-    === Private Attributes ===
-    _proceed:
-      True when the player should make a move, False when the player should
-      wait.
+    workers:
+        The number of worker processes that try candidate moves, or 0 to try
+        them in this process.
+    time_limit:
+        If not None, the number of seconds this player tries candidate moves
+        for on each turn, instead of trying <difficulty> of them.
+    candidates:
+        The number of candidate moves tried on this player's last turn.
     """
     id: int
     goal: Goal
     difficulty: int
-    _proceed: bool
+    workers: int
+    time_limit: Optional[float]
+    candidates: int
 
-    def __init__(self, player_id: int, goal: Goal, difficulty: int) -> None:
+    def __init__(self, player_id: int, goal: Goal, difficulty: int,
+                 workers: int = 0, time_limit: Optional[float] = None) -> None:
         # TODO: Implement Me
-        Player.__init__(self, player_id, goal)
+        _ComputerPlayer.__init__(self, player_id, goal)
         self.difficulty = difficulty
-        self._proceed = False
-
-    def get_selected_block(self, board: Block) -> Optional[Block]:
-        return None
-
-    def process_event(self, event: pygame.event.Event) -> None:
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            self._proceed = True
+        self.workers = workers
+        self.time_limit = time_limit
+        self.candidates = 0
 
     def _generate_move_helper(self, board: Block, move_list: List) -> None:
-        """ Append a valid move for self on board to move_list."""
-        valid_move = False          # checker for validity
-        all_moves = [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
-                     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH,
-                     COMBINE, PAINT]
-        final_move = None
-        while not valid_move:
-            block = None
-            move_type = random.randint(0, len(all_moves) - 1)
-            board_copy = board.create_copy()
-            random_x = 0
-            random_y = 0
-            block_level = 0
-            while block is None:
-                # repeat if the block selected is None, i.e. no block at
-                # that position at that depth
-                block_level = random.randint(0, board.max_depth)
-                random_x = random.randint(0, board.size)
-                random_y = random.randint(0, board.size)
-                block = _get_block(board_copy, (random_x, random_y),
-                                   block_level)
-            board_block = _get_block(board, (random_x, random_y), block_level)
-            if move_type == 0:
-                if block.rotate(1):
-                    final_move = (ROTATE_CLOCKWISE +
-                                  (block, self.goal.score(board_copy),
-                                   board_block))
-                    valid_move = True
-            elif move_type == 1:
-                if block.rotate(3):
-                    final_move = (ROTATE_COUNTER_CLOCKWISE +
-                                  (block, self.goal.score(board_copy),
-                                   board_block))
-                    valid_move = True
-            elif move_type == 2:
-                if block.swap(0):
-                    final_move = (SWAP_HORIZONTAL +
-                                  (block, self.goal.score(board_copy),
-                                   board_block))
-                    valid_move = True
-            elif move_type == 3:
-                if block.swap(1):
-                    final_move = (SWAP_VERTICAL +
-                                  (block, self.goal.score(board_copy),
-                                   board_block))
-                    valid_move = True
-            elif move_type == 4:
-                if block.smash():
-                    final_move = (SMASH + (block, self.goal.score(board_copy),
-                                           board_block))
-                    valid_move = True
-            elif move_type == 5:
-                if block.combine():
-                    final_move = (COMBINE + (block, self.goal.score(board_copy),
-                                             board_block))
-                    valid_move = True
-            else:  # move_type == 6:
-                if block.paint(self.goal.colour):
-                    final_move = (PAINT + (block, self.goal.score(board_copy),
-                                           board_block))
-                    valid_move = True
-
-        move_list.append(final_move)
+        """ Append a valid move for self on board to move_list, along with the
+        score for self's goal after the move.
 
-    def generate_move(self, board: Block) -> \
-            Optional[Tuple[str, Optional[int], Block]]:
+        Each move is tried on a branch of <board> that shares every block the
+        move does not touch, rather than on a full copy of <board>. If there is
+        no valid move, move_list is left unchanged.
+        """
+        choice = random_legal_path(board, self.goal.colour)
+        if choice is not None:
+            action, path = choice
+            trial_board, block = board.branch(path)
+            block.apply_action(action, self.goal.colour)
+            move_list.append(action + (board.descendant(path),
+                                       self._score(trial_board)))
+
+    def _timed_moves(self, board: Block, move_list: List, deadline: float,
+                     cancel: Optional[threading.Event]) -> None:
+        """Append valid moves for self on board to move_list, along with the
+        score for self's goal after each move, as in _generate_move_helper,
+        until time.perf_counter() reaches <deadline> or <cancel> is set.
+
+        At least one move is tried, and the last one may end after
+        <deadline>.
+        """
+        while True:
+            tried = len(move_list)
+            self._generate_move_helper(board, move_list)
+            if len(move_list) == tried or time.perf_counter() >= deadline \
+                    or _stopped(cancel):
+                # There is no valid move, no time left, or no need for one
+                return
+
+    def _parallel_moves(self, board: Block, move_list: List,
+                        deadline: Optional[float],
+                        cancel: Optional[threading.Event]) -> None:
+        """Append <difficulty> valid moves for self on board to move_list,
+        along with the score for self's goal after each move, as in
+        _generate_move_helper, but tried by the worker processes.
+
+        If <deadline> is given, moves are instead tried in rounds of one job
+        per worker until time.perf_counter() reaches it, which may be up to a
+        round later. Either way, no new round is started once <cancel> is set.
+
+        The board is sent to the workers as a LinearBlock, and they send back
+        paths rather than blocks. The moves are split into jobs of a fixed
+        size, each with a seed drawn from the random module, and appended in
+        the order of the jobs, so the moves do not depend on which worker
+        tries them.
+        """
+        linear_board = LinearBlock.from_block(board)
+        # A fresh goal, so that no cached state is sent with it
+        goal = type(self.goal)(self.goal.colour)
+        if deadline is None:
+            counts = [min(_CANDIDATES_PER_JOB, self.difficulty - start)
+                      for start in range(0, self.difficulty,
+                                         _CANDIDATES_PER_JOB)]
+        else:
+            counts = [_CANDIDATES_PER_JOB] * self.workers
+        pool = _worker_pool(self.workers)
+        while True:
+            tried = len(move_list)
+            jobs = [(linear_board, goal, count, random.getrandbits(32))
+                    for count in counts]
+            for candidates in pool.map(_evaluate_candidates, jobs):
+                for action, path, score in candidates:
+                    move_list.append(action + (board.descendant(path), score))
+            if deadline is None or len(move_list) == tried or \
+                    time.perf_counter() >= deadline or _stopped(cancel):
+                return
+
+    def choose_move(self, board: Block,
+                    cancel: Optional[threading.Event] = None) -> \
+            Tuple[str, Optional[int], Block]:
         """Return a valid move by assessing multiple valid moves and choosing
         the move that results in the highest score for this player's goal (i.e.,
         disregarding penalties).
@@ -421,23 +575,325 @@ class SmartPlayer(Player):
         performed on the <board>. If no move can be found that is better than
         the current score, this player will pass.
 
+        If this player has a time limit, it assesses as many moves as it can
+        within the limit rather than <difficulty> moves, and returns the best
+        one found by then. If it has workers, the moves are tried by them in
+        parallel. If <cancel> is set meanwhile, it stops assessing moves and
+        returns the best one found so far.
+
         This function does not mutate <board>.
         """
-        if not self._proceed:
-            return None  # Do not remove
-        # TODO: Implement Me
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
         move_list = []
-        current_score = self.goal.score(board)
-        best_move = PASS + (board, current_score, board)
-        while len(move_list) < self.difficulty:
-            self._generate_move_helper(board, move_list)
+        self._scores.new_generation()
+        current_score = self._score(board, 1)
+        best_move = PASS + (board, current_score)
+        if self.workers > 0:
+            self._parallel_moves(board, move_list, deadline, cancel)
+        elif deadline is not None:
+            self._timed_moves(board, move_list, deadline, cancel)
+        else:
+            for _ in range(self.difficulty):
+                if _stopped(cancel):
+                    break
+                self._generate_move_helper(board, move_list)
+        self.candidates = len(move_list)
         for move in move_list:
             if move[3] > current_score:
                 current_score = move[3]
                 best_move = move
-        actual_action = best_move[0], best_move[1], best_move[4]
-        self._proceed = False  # Must set to False before returning!
-        return actual_action  # FIXME
+        actual_action = best_move[0], best_move[1], best_move[2]
+        return actual_action
+
+
+# A move as stored in a search tree: an action and the path of child indices
+# to the block it is performed on
+_Move = Tuple[Tuple[str, Optional[int]], Tuple[int, ...]]
+_PASS_MOVE = (PASS, ())
+# How quickly the number of moves tried in a state grows with its visits
+_WIDENING = 3
+
+
+class _SearchNode:
+    """A board state in the search tree of an MCTSPlayer.
+
+    === Public Attributes ===
+    key:
+        The hash of the board in this state, or None if it has not been
+        reached yet.
+    children:
+        The states reached by each move that has been tried in this state.
+    visits:
+        The number of searches that went through this state.
+    total:
+        The sum of the values of those searches.
+    """
+    key: Optional[int]
+    children: Dict[_Move, _SearchNode]
+    visits: int
+    total: float
+
+    def __init__(self, key: Optional[int] = None) -> None:
+        """Initialize a state that has not been searched, with <key>.
+        """
+        self.key = key
+        self.children = {}
+        self.visits = 0
+        self.total = 0.0
+
+    def find(self, key: int, depth: int) -> Optional[_SearchNode]:
+        """Return the state <depth> moves below this one whose hash is
+        <key>, or None if there is none.
+        """
+        if depth == 0:
+            return self if self.key == key else None
+        for child in self.children.values():
+            found = child.find(key, depth - 1)
+            if found is not None:
+                return found
+        return None
+
+
+def _target(board: Block, indices: Tuple[int, ...]) -> Optional[Block]:
+    """Return the block of <board> reached by following <indices>, or None
+    if there is no such block.
+    """
+    block = board
+    for i in indices:
+        if not block.children:
+            return None
+        block = block.children[i]
+    return block
+
+
+def _fits(board: Block, move: _Move, colour: Tuple[int, int, int]) -> bool:
+    """Return True iff <move> can be performed on <board>, painting with
+    <colour>.
+    """
+    action, indices = move
+    block = _target(board, indices)
+    return block is not None and (action == PASS or
+                                  is_legal(block, action, colour))
+
+
+def _try_move(board: Block, move: _Move, colour: Tuple[int, int, int],
+              log: List) -> bool:
+    """Perform <move> on <board>, painting with <colour>, and append its undo
+    record to <log>. Return True iff the move could be performed.
+    """
+    action, indices = move
+    block = _target(board, indices)
+    return block is not None and block.apply_action(action, colour, log)
+
+
+class MCTSPlayer(_ComputerPlayer):
+    """ A player that chooses its moves by Monte Carlo tree search.
+
+    The search looks <horizon> moves ahead, including the other players'
+    moves, which are played at random since their goals are unknown. Moves
+    are tried on a single copy of the board and undone afterwards. The other
+    players' moves are sampled at random, and only a growing number of this
+    player's own moves are tried in each state, since there are far too many
+    to try them all. Smashes are random, so a state may stand for several
+    boards; a search stops following the tree when a move in it does not fit
+    the board.
+
+    Past the part of the tree built so far, a search plays the other
+    players' moves at random and passes for this player up to the horizon.
+    Its value is this player's score at the end, minus the penalties for this
+    player's moves. Moves are chosen by how well they have done so far and
+    how little they have been tried (UCB1), and the move made is the one
+    tried most.
+
+    The part of the tree below the move made is kept, and reused on this
+    player's next turn if the board then is one the search reached.
+
+    === Public Attributes ===
+    id:
+        This player's number.
+    goal:
+        This player's assigned goal for the game.
+    budget:
+        The number of seconds this player may think about each move.
+    num_players:
+        The number of players in the game.
+    horizon:
+        The number of moves each search looks ahead.
+    iterations:
+        The number of searches made for the last move.
+    === Private Attributes ===
+    _tree:
+      The state reached by this player's last move, or None.
+    """
+    id: int
+    goal: Goal
+    budget: float
+    num_players: int
+    horizon: int
+    iterations: int
+    _tree: Optional[_SearchNode]
+
+    def __init__(self, player_id: int, goal: Goal, budget: float,
+                 num_players: int = 2, horizon: Optional[int] = None) -> None:
+        """Initialize this MCTSPlayer, which may think for <budget> seconds
+        about each move of a game with <num_players> players, and looks ahead
+        <horizon> moves, or up to and including its next move if <horizon> is
+        None.
+
+        Raise a ValueError if <horizon> is less than 1.
+
+        Precondition: budget >= 0 and num_players >= 1
+        """
+        if horizon is not None and horizon < 1:
+            raise ValueError(f'an MCTSPlayer must look at least one move '
+                             f'ahead, not {horizon}')
+        _ComputerPlayer.__init__(self, player_id, goal, 1 << 14)
+        self.budget = budget
+        self.num_players = num_players
+        self.horizon = num_players + 1 if horizon is None else horizon
+        self.iterations = 0
+        self._tree = None
+
+    def _root(self, board: Block) -> _SearchNode:
+        """Return the state to search from for a move on <board>: the state
+        the last search reached for <board> if there is one, or a new state.
+        """
+        key = board.zobrist_hash()
+        if self._tree is not None:
+            # The other players have moved since this player's last move
+            root = self._tree.find(key, self.num_players - 1)
+            if root is not None:
+                # The moves were tried on boards with this hash, but smashes
+                # are random, so not every board that reached this state had it
+                root.children = {move: child for move, child
+                                 in root.children.items()
+                                 if _fits(board, move, self.goal.colour)}
+                return root
+        return _SearchNode(key)
+
+    def _sample(self, board: Block, colour: Tuple[int, int, int]) -> _Move:
+        """Return a random valid move on <board> for a player whose goal is
+        <colour>, or a pass if there is none.
+        """
+        choice = random_legal_path(board, colour)
+        if choice is None:
+            return _PASS_MOVE
+        return choice[0], tuple(choice[1])
+
+    def _choose(self, node: _SearchNode, board: Block,
+                bounds: List[float]) -> _Move:
+        """Return the move for this player to try in the state <node> of
+        <board>: a move not tried yet if <node> has been visited often enough
+        for another one, or else the move with the best UCB1 value.
+
+        <bounds> holds the lowest and highest value of any search so far,
+        which scale values to between 0 and 1.
+        """
+        if _PASS_MOVE not in node.children:
+            return _PASS_MOVE
+        if len(node.children) < _WIDENING * math.sqrt(node.visits + 1):
+            return self._sample(board, self.goal.colour)
+        spread = max(bounds[1] - bounds[0], 1)
+        log_visits = math.log(node.visits + 1)
+
+        def ucb(move: _Move) -> float:
+            child = node.children[move]
+            if child.visits == 0:
+                return math.inf
+            mean = (child.total / child.visits - bounds[0]) / spread
+            return mean + math.sqrt(2 * log_visits / child.visits)
+        return max(node.children, key=ucb)
+
+    def _search(self, root: _SearchNode, board: Block,
+                bounds: List[float]) -> None:
+        """Make one search from the state <root> of <board>, and add its
+        value to every state it went through. <board> is left unchanged.
+        """
+        others = [colour for colour in COLOUR_LIST
+                  if colour != self.goal.colour] or [self.goal.colour]
+        log = []
+        path = [root]
+        node = root
+        penalty = 0
+        for depth in range(self.horizon):
+            seat = depth % self.num_players
+            own = seat == 0
+            # Assume each other player paints with a different colour
+            colour = self.goal.colour if own else \
+                others[(seat - 1) % len(others)]
+            move = None
+            if node is not None and own:
+                move = self._choose(node, board, bounds)
+                if not _try_move(board, move, colour, log):
+                    # Smashes are random, so a move tried before in this
+                    # state may not fit this board; stop using the tree
+                    node = None
+                    move = None
+            if move is None and own:
+                # Past the tree, this player's own random moves would mostly
+                # add noise (and penalties), so it passes
+                move = _PASS_MOVE
+            elif move is None:
+                move = self._sample(board, colour)
+                _try_move(board, move, colour, log)
+            action = move[0]
+            if own:
+                penalty += ACTION_PENALTY[action]
+            if node is not None:
+                child = node.children.get(move)
+                if child is None:
+                    # Grow the tree by one state per search
+                    child = _SearchNode(board.zobrist_hash())
+                    node.children[move] = child
+                    path.append(child)
+                    node = None
+                else:
+                    path.append(child)
+                    node = child
+
+        value = self._score(board) - penalty
+        bounds[0] = min(bounds[0], value)
+        bounds[1] = max(bounds[1], value)
+        for state in path:
+            state.visits += 1
+            state.total += value
+        for record in reversed(log):
+            board.undo(record)
+
+    def choose_move(self, board: Block,
+                    cancel: Optional[threading.Event] = None) -> \
+            Tuple[str, Optional[int], Block]:
+        """Return a valid move, found by searching for up to <budget>
+        seconds, or until <cancel> is set. Passing is also considered.
+
+        If the search tried no move at all, return a random valid move, or a
+        pass if there is none.
+
+        This function does not mutate <board>.
+        """
+        deadline = time.perf_counter() + self.budget
+        root = self._root(board)
+        work = board.create_copy()
+        self._scores.new_generation()
+        score = self._score(board, self.horizon)
+        bounds = [score, score]
+        self.iterations = 0
+        while self.iterations == 0 or (time.perf_counter() < deadline and
+                                       not _stopped(cancel)):
+            self._search(root, work, bounds)
+            self.iterations += 1
+
+        if not root.children:
+            self._tree = None
+            move = random_legal_move(board, self.goal.colour)
+            return PASS + (board,) if move is None else move
+        move = max(root.children,
+                   key=lambda option: root.children[option].visits)
+        self._tree = root.children[move]
+        action, indices = move
+        return action + (board.descendant(list(indices)),)
 
 
 if __name__ == '__main__':
@@ -447,7 +903,9 @@ if __name__ == '__main__':
         'allowed-io': ['process_event'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'actions', 'block',
-            'goal', 'pygame', '__future__'
+            'goal', 'pygame', '__future__', 'transposition', 'moves',
+            'settings', 'math', 'time', 'multiprocessing', 'linear_block',
+            'atexit', 'threading'
         ],
         'max-attributes': 10,
         'generated-members': 'pygame.*'
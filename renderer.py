@@ -19,20 +19,37 @@ Misha Schwartz, and Jaisie Sin.
 
 === Module Description ===
 
-This file contains the class that "renders" the image of our game.
+This file contains the class that "renders" the image of our game, and
+functions that draw boards into images in memory, without a display.
 """
-from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+import math
+from typing import Any, Dict, List, Tuple, Optional, Union
+import numpy as np
 import pygame
 
+from block import Block
 from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, ACTION_KEY, ACTION_LABEL, COMBINE,\
     PAINT, PASS
 from settings import BACKGROUND_COLOUR, TEXT_COLOUR, OUTLINE_THICKNESS, \
     OUTLINE_COLOUR, HIGHLIGHT_THICKNESS, HIGHLIGHT_COLOUR, COLOUR_LIST, \
-    colour_name
+    BOARD_SIZE, colour_name
 
 Y_FONT_PADDING = 2
 
+# The number of scaled action images kept for sizes that no block on the board
+# can have
+MAX_EXTRA_IMAGES = 32
+
+# A square to draw, as returned by blocky._block_to_squares: its colour, the
+# (x, y) position of its upper left corner, and its size
+Square = Tuple[Tuple[int, int, int], Tuple[int, int], int]
+
+# What is drawn for a block: its hash, and what is drawn for each of its
+# children, or an empty list if it is undivided
+_Drawn = Tuple[int, List[Any]]
+
 
 def _load_image(path_to_file: str) -> pygame.Surface:
     """
@@ -50,6 +67,90 @@ def _load_image(path_to_file: str) -> pygame.Surface:
     return image
 
 
+def _scale_image(image: pygame.Surface, size: int) -> pygame.Surface:
+    """Return <image> scaled to <size> x <size>, in the pixel format of the
+    screen so that it is quick to draw.
+
+    Precondition: the display mode has been set.
+    """
+    return pygame.transform.scale(image, (size, size)).convert_alpha()
+
+
+def _board_cells(board: Union[Block, List[Square]]) -> \
+        Tuple[List[Tuple[int, int, int, Tuple[int, int, int]]], int]:
+    """Return a tuple (column, row, width, colour) for every undivided block
+    in <board>, and the width of the whole board, all in the same units.
+
+    <board> is either a Block, whose units are blocks at max_depth, or a list
+    of squares, whose units are pixels.
+    """
+    if isinstance(board, Block):
+        return list(board.leaf_cells()), 2 ** (board.max_depth - board.level)
+    left = min(pos[0] for _, pos, _ in board)
+    top = min(pos[1] for _, pos, _ in board)
+    width = max(max(pos[0] - left, pos[1] - top) + size
+                for _, pos, size in board)
+    return [(pos[0] - left, pos[1] - top, size, colour)
+            for colour, pos, size in board], width
+
+
+def draw_offscreen(board: Union[Block, List[Square]],
+                   resolution: int) -> pygame.Surface:
+    """Return an image of <board> that is <resolution> x <resolution> pixels,
+    drawn in memory so that no display is needed.
+
+    <board> is either a Block or the squares of one, as returned by
+    blocky._block_to_squares. Outlines are scaled with the image, so they are
+    left out once they would be thinner than a pixel.
+
+    Precondition: <board> has at least one square
+    """
+    cells, width = _board_cells(board)
+    scale = resolution / width
+    thickness = round(OUTLINE_THICKNESS * resolution / BOARD_SIZE)
+    image = pygame.Surface((resolution, resolution))
+    image.fill(BACKGROUND_COLOUR)
+    for column, row, size, colour in cells:
+        x, y = round(column * scale), round(row * scale)
+        rect = (x, y, round((column + size) * scale) - x,
+                round((row + size) * scale) - y)
+        pygame.draw.rect(image, colour, rect, 0)
+        if thickness > 0:
+            pygame.draw.rect(image, OUTLINE_COLOUR, rect, thickness)
+    return image
+
+
+def contact_sheet(boards: List[Union[Block, List[Square]]], resolution: int,
+                  columns: int = 0, padding: int = 4) -> pygame.Surface:
+    """Return one image with an image of each of <boards>, as drawn by
+    draw_offscreen at <resolution>, in rows of <columns> from left to right.
+
+    If <columns> is 0, the boards are laid out in a square. The images are
+    <padding> pixels apart, and from the edges of the sheet.
+
+    Precondition: len(boards) >= 1
+    """
+    if columns <= 0:
+        columns = math.ceil(math.sqrt(len(boards)))
+    rows = math.ceil(len(boards) / columns)
+    step = resolution + padding
+    sheet = pygame.Surface((columns * step + padding, rows * step + padding))
+    sheet.fill(BACKGROUND_COLOUR)
+    for i, board in enumerate(boards):
+        row, column = divmod(i, columns)
+        sheet.blit(draw_offscreen(board, resolution),
+                   (padding + column * step, padding + row * step))
+    return sheet
+
+
+def image_array(image: pygame.Surface) -> np.ndarray:
+    """Return the pixels of <image> as an array of RGB values, indexed by row
+    and then column, as most image libraries expect.
+    """
+    return np.ascontiguousarray(
+        pygame.surfarray.array3d(image).transpose(1, 0, 2))
+
+
 def _print_to_image(text: str, x: int, y: int, font: pygame.font.Font,
                     image: pygame.Surface,
                     colour: Tuple[int, int, int] = TEXT_COLOUR) -> None:
@@ -150,17 +251,35 @@ class Renderer:
     #   The font to use for text being drawn.
     # _images:
     #   A dictionary mapping actions to images that are displayed in the game.
+    # _scaled:
+    #   The images in _images scaled to every size a block on the board can
+    #   have, keyed by action and size.
+    # _extra_scaled:
+    #   The images in _images scaled to other sizes, keyed by action and size,
+    #   from least to most recently drawn. There are at most MAX_EXTRA_IMAGES.
     # _status_position:
     #   The (x, y) position of the status messages.
+    # _board_image:
+    #   An image of the last board drawn by draw_block.
+    # _drawn:
+    #   What is drawn on _board_image, or None if nothing is.
     _screen: pygame.Surface
     _instructions: pygame.Surface
     _images: Dict[Tuple[str, Optional[int]], pygame.Surface]
+    _scaled: Dict[Tuple[Tuple[str, Optional[int]], int], pygame.Surface]
+    _extra_scaled: OrderedDict
     _font: pygame.font.Font
     _status_position: Tuple[int, int]
     _clear_rect: Tuple[Tuple[int, int], Tuple[int, int]]
+    _board_image: pygame.Surface
+    _drawn: Optional[_Drawn]
 
-    def __init__(self, size: int) -> None:
-        """Initialize this Renderer for a board with dimensions <size> x <size>.
+    def __init__(self, size: int, max_depth: int = 0) -> None:
+        """Initialize this Renderer for a board with dimensions <size> x <size>
+        and the given <max_depth>.
+
+        The action images are scaled up front to the size of every level of
+        the board, down to <max_depth>.
         """
         self._font = pygame.font.Font(pygame.font.get_default_font(), 14)
         status_height = self._font.size("Player")[1]
@@ -175,6 +294,8 @@ class Renderer:
 
         self._status_position = (10, size + Y_FONT_PADDING)
         self._clear_rect = ((0, 0), (size, height))
+        self._board_image = pygame.Surface((size, size))
+        self._drawn = None
 
         self._images = {
             ROTATE_CLOCKWISE: _load_image('images/rotate-cw.png'),
@@ -186,6 +307,13 @@ class Renderer:
             PAINT: _load_image('images/paint.png'),
             PASS: _load_image('images/pass.png')
         }
+        self._scaled = {}
+        self._extra_scaled = OrderedDict()
+        for _ in range(max_depth + 1):
+            for action, image in self._images.items():
+                self._scaled[action, size] = _scale_image(image, size)
+            # The same rounding as Block._child_size
+            size = round(size / 2.0)
 
     def clear(self) -> None:
         """Clear the screen with BACKGROUND_COLOUR.
@@ -200,9 +328,28 @@ class Renderer:
         If the action is not supported, no image is drawn.
         """
         if action in self._images:
-            image = self._images[action]
-            image = pygame.transform.scale(image, (size, size))
-            self._screen.blit(image, pos)
+            self._screen.blit(self._scaled_image(action, size), pos)
+
+    def _scaled_image(self, action: Tuple[str, Optional[int]],
+                      size: int) -> pygame.Surface:
+        """Return the image for <action> scaled to <size> x <size>.
+
+        Images scaled to sizes that blocks cannot have are kept too, but only
+        the MAX_EXTRA_IMAGES most recently used ones.
+
+        Precondition: action in self._images
+        """
+        key = (action, size)
+        if key in self._scaled:
+            return self._scaled[key]
+        if key in self._extra_scaled:
+            self._extra_scaled.move_to_end(key)
+            return self._extra_scaled[key]
+        image = _scale_image(self._images[action], size)
+        self._extra_scaled[key] = image
+        if len(self._extra_scaled) > MAX_EXTRA_IMAGES:
+            self._extra_scaled.popitem(last=False)
+        return image
 
     def draw_board(self, squares: List[Tuple[Tuple[int, int, int],
                                              Tuple[int, int], int]]) -> None:
@@ -214,6 +361,42 @@ class Renderer:
             pygame.draw.rect(self._screen, OUTLINE_COLOUR, rect,
                              OUTLINE_THICKNESS)
 
+    def draw_block(self, board: Block) -> None:
+        """Draw every undivided block in <board> onto the screen.
+
+        The board is kept on an image between calls, and only the blocks that
+        differ from the last board drawn are painted onto it again. Drawing a
+        board that has not changed is a single blit.
+        """
+        if self._board_image.get_size() != (board.size, board.size):
+            self._board_image = pygame.Surface((board.size, board.size))
+            self._drawn = None
+        self._drawn = self._repaint(board, self._drawn, board.position)
+        self._screen.blit(self._board_image, board.position)
+
+    def _repaint(self, block: Block, drawn: Optional[_Drawn],
+                 origin: Tuple[int, int]) -> _Drawn:
+        """Paint <block> onto the board image, where <drawn> is what is drawn
+        there now, and return what is drawn there afterwards.
+
+        Only the undivided blocks whose part of the image has changed are
+        painted. <origin> is the position of the board the image is of.
+        """
+        key = block.zobrist_hash()
+        if drawn is not None and drawn[0] == key:
+            return drawn
+        if not block.children:
+            rect = (block.position[0] - origin[0],
+                    block.position[1] - origin[1], block.size, block.size)
+            pygame.draw.rect(self._board_image, block.colour, rect, 0)
+            pygame.draw.rect(self._board_image, OUTLINE_COLOUR, rect,
+                             OUTLINE_THICKNESS)
+            return key, []
+        if drawn is None or not drawn[1]:
+            drawn = (key, [None] * 4)
+        return key, [self._repaint(child, old, origin)
+                     for child, old in zip(block.children, drawn[1])]
+
     def highlight_block(self, pos: Tuple[int, int], size: int) -> None:
         """Draw a highlighted square border at pos with size.
         """
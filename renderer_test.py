@@ -0,0 +1,147 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for renderer.py, run offscreen with SDL's dummy
+video driver: which blocks draw_block repaints, and which scaled action
+images are kept.
+"""
+import os
+import random
+from typing import Iterator, List, Tuple
+
+import pygame
+import pytest
+
+from actions import PAINT
+from block import Block, generate_board
+from board_helpers import random_path
+from moves import BLOCK_ACTIONS
+from renderer import MAX_EXTRA_IMAGES, Renderer
+from settings import BOARD_SIZE, COLOUR_LIST
+
+
+@pytest.fixture(autouse=True)
+def display(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Start pygame without a window, from the directory of the images.
+    """
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    yield
+    pygame.quit()
+
+
+def _painted(monkeypatch: pytest.MonkeyPatch) -> List[pygame.Rect]:
+    """Return a list that every rectangle drawn from now on is added to.
+    """
+    rects = []
+    draw_rect = pygame.draw.rect
+
+    def record(surface: pygame.Surface, colour: Tuple[int, int, int],
+               rect: Tuple[int, int, int, int], *args: int) -> pygame.Rect:
+        rects.append(pygame.Rect(rect))
+        return draw_rect(surface, colour, rect, *args)
+    monkeypatch.setattr(pygame.draw, 'rect', record)
+    return rects
+
+
+def _leaves(block: Block) -> List[pygame.Rect]:
+    """Return the square of every undivided block in <block>.
+    """
+    if not block.children:
+        return [pygame.Rect(block.position, (block.size, block.size))]
+    return [rect for child in block.children for rect in _leaves(child)]
+
+
+def _pixels(renderer: Renderer, board: Block) -> bytes:
+    """Return the pixels of the board drawn by <renderer>.
+    """
+    area = pygame.Rect(board.position, (board.size, board.size))
+    return pygame.image.tostring(pygame.display.get_surface().subsurface(
+        area), 'RGB')
+
+
+def test_unchanged_board_repaints_nothing(
+        seed: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that drawing the same board again paints no block.
+    """
+    random.seed(seed)
+    board = generate_board(random.randint(0, 4), BOARD_SIZE)
+    renderer = Renderer(board.size, board.max_depth)
+    renderer.draw_block(board)
+    painted = _painted(monkeypatch)
+    renderer.draw_block(board)
+    assert painted == []
+
+
+def test_move_repaints_only_moved_block(
+        seed: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that after a move, only the undivided blocks of the block it was
+    made on are painted, and the board then looks as if it had been drawn
+    from scratch.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    board = generate_board(rng.randint(1, 4), BOARD_SIZE)
+    renderer = Renderer(board.size, board.max_depth)
+    renderer.draw_block(board)
+
+    block = board.descendant(random_path(board, rng))
+    action = PAINT if block.paintable(COLOUR_LIST[0]) else \
+        rng.choice(BLOCK_ACTIONS)
+    painted = _painted(monkeypatch)
+    if block.apply_action(action, COLOUR_LIST[0]):
+        renderer.draw_block(board)
+        assert painted
+        leaves = _leaves(block)
+        assert all(rect in leaves for rect in painted)
+    else:
+        renderer.draw_block(board)
+        assert painted == []
+    monkeypatch.undo()
+
+    incremental = _pixels(renderer, board)
+    fresh = Renderer(board.size, board.max_depth)
+    fresh.draw_block(board)
+    assert _pixels(fresh, board) == incremental
+
+
+def test_extra_images_evict_least_recently_used() -> None:
+    """Test that at most MAX_EXTRA_IMAGES images scaled to sizes blocks
+    cannot have are kept, and that the least recently used one goes first.
+    """
+    renderer = Renderer(BOARD_SIZE, 2)
+    action = BLOCK_ACTIONS[0]
+    sizes = list(range(1, MAX_EXTRA_IMAGES + 1))
+    images = [renderer._scaled_image(action, size) for size in sizes]
+    assert renderer._scaled_image(action, BOARD_SIZE) is \
+        renderer._scaled_image(action, BOARD_SIZE)
+    # Use the oldest image again, so that the second oldest goes instead
+    assert renderer._scaled_image(action, sizes[0]) is images[0]
+    renderer._scaled_image(action, MAX_EXTRA_IMAGES + 1)
+    assert renderer._scaled_image(action, sizes[0]) is images[0]
+    assert renderer._scaled_image(action, sizes[2]) is images[2]
+    assert renderer._scaled_image(action, sizes[1]) is not images[1]
+
+
+if __name__ == '__main__':
+    pytest.main(['renderer_test.py'])
@@ -35,6 +35,8 @@ TEMPTING_TURQUOISE = (75, 196, 213)
 
 # A pallette of the colours we use in the game
 COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
+# The index of each colour in COLOUR_LIST, for compact colour storage
+COLOUR_INDEX = {colour: i for i, colour in enumerate(COLOUR_LIST)}
 
 # The game board will be a square with this size.
 BOARD_SIZE = 750
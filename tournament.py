@@ -0,0 +1,385 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains the Tournament class, which plays many headless games
+between configurations of computer players on every core of the machine, and
+the Standings class, which turns their results into win rates and Elo ratings
+with confidence intervals.
+
+At the bottom of the file, run_sample_tournament plays a sample tournament
+between the players of create_auto_game.
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+import math
+import multiprocessing
+import random
+
+from block import generate_board
+from engine import play_game
+from goal import generate_goals
+from player import PlayerConfig, make_player
+from settings import BOARD_SIZE
+
+# The result of one game: its number in the tournament, the indices of the
+# configurations that moved first and second, and their final scores after
+# penalties, in that order
+GameResult = Tuple[int, int, int, int, int]
+
+# A game for a worker to play: its number, the indices and configurations of
+# the players that move first and second, the max_depth of the board, the
+# number of turns, and the seed for the random number generator
+_GameJob = Tuple[int, int, int, PlayerConfig, PlayerConfig, int, int, int]
+
+# The number of Elo points per natural log of the odds of winning
+_ELO_SCALE = 400 / math.log(10)
+# The rating of a player with even odds against the reference player
+_BASE_RATING = 1500
+# The number of standard errors on each side of a 95% confidence interval
+_Z_95 = 1.96
+
+
+def _play(job: _GameJob) -> GameResult:
+    """Play the game described by <job> and return its result.
+
+    The random number generator is seeded from <job> first, so a game has
+    the same result whichever worker process plays it.
+    """
+    number, first, second, first_config, second_config, max_depth, \
+        num_turns, seed = job
+    random.seed(seed)
+    board = generate_board(max_depth, BOARD_SIZE)
+    goals = generate_goals(2)
+    players = [make_player(first_config, 0, goals[0]),
+               make_player(second_config, 1, goals[1])]
+    outcome = play_game(board, players, num_turns)
+    return number, first, second, outcome.total(0), outcome.total(1)
+
+
+def config_name(config: PlayerConfig) -> str:
+    """Return a short name for the player described by <config>.
+
+    >>> config_name(('smart', 3))
+    'smart(3)'
+    >>> config_name(('random', 0))
+    'random'
+    """
+    kind, difficulty = config
+    if kind == 'random':
+        return kind
+    return f'{kind}({difficulty})'
+
+
+class Standings:
+    """The results so far of games between configurations of players.
+
+    A win is worth one point, a draw (equal final scores) half a point and a
+    loss nothing.
+
+    Ratings are the Elo ratings that best explain all the results at once
+    (a Bradley-Terry model), so they do not depend on the order the games
+    finished in. Every configuration is also counted as having drawn one game
+    against a reference player rated _BASE_RATING, so that a configuration
+    that won or lost every game still gets a finite rating.
+
+    === Public Attributes ===
+    configs:
+        The configurations of players that take part.
+    results:
+        The result of every game recorded, in the order they were recorded.
+
+    === Representation Invariants ===
+    - len(configs) >= 2
+    """
+    # === Private Attributes ===
+    # _games:
+    #   _games[i][j] is the number of games between configs i and j.
+    # _points:
+    #   _points[i][j] is the number of points config i scored against config j.
+    configs: List[PlayerConfig]
+    results: List[GameResult]
+    _games: List[List[int]]
+    _points: List[List[float]]
+
+    def __init__(self, configs: List[PlayerConfig]) -> None:
+        """Initialize standings with no games between <configs>.
+        """
+        self.configs = configs
+        self.results = []
+        self._games = [[0] * len(configs) for _ in configs]
+        self._points = [[0.0] * len(configs) for _ in configs]
+
+    def record(self, result: GameResult) -> None:
+        """Add <result> to these standings.
+        """
+        _, first, second, first_total, second_total = result
+        self.results.append(result)
+        self._games[first][second] += 1
+        self._games[second][first] += 1
+        if first_total > second_total:
+            self._points[first][second] += 1
+        elif first_total < second_total:
+            self._points[second][first] += 1
+        else:
+            self._points[first][second] += 0.5
+            self._points[second][first] += 0.5
+
+    def games(self, index: int, opponent: Optional[int] = None) -> int:
+        """Return the number of games config <index> has played, against
+        <opponent> if it is given.
+        """
+        if opponent is not None:
+            return self._games[index][opponent]
+        return sum(self._games[index])
+
+    def points(self, index: int) -> float:
+        """Return the number of points config <index> has scored.
+        """
+        return sum(self._points[index])
+
+    def win_rate(self, index: int) -> Tuple[float, float, float]:
+        """Return the share of points config <index> has scored in its games,
+        and the lower and upper ends of its 95% (Wilson score) confidence
+        interval.
+
+        Return (0.0, 0.0, 1.0) if it has not played.
+        """
+        n = self.games(index)
+        if n == 0:
+            return 0.0, 0.0, 1.0
+        rate = self.points(index) / n
+        z2 = _Z_95 * _Z_95
+        centre = (rate + z2 / (2 * n)) / (1 + z2 / n)
+        spread = _Z_95 * math.sqrt(rate * (1 - rate) / n + z2 / (4 * n * n)) \
+            / (1 + z2 / n)
+        return rate, max(0.0, centre - spread), min(1.0, centre + spread)
+
+    def ratings(self) -> List[Tuple[float, float]]:
+        """Return the Elo rating of each config, and the half-width of its
+        95% confidence interval, in the same order as configs.
+        """
+        n = len(self.configs)
+        # The strength of each config: the odds of i beating j are
+        # strengths[i] / strengths[j], and the reference player's is 1
+        strengths = [1.0] * n
+        for _ in range(1000):
+            new = []
+            for i in range(n):
+                expected = 1 / (strengths[i] + 1)
+                for j in range(n):
+                    if self._games[i][j]:
+                        expected += self._games[i][j] / \
+                            (strengths[i] + strengths[j])
+                new.append((self.points(i) + 0.5) / expected)
+            done = all(abs(math.log(a / b)) < 1e-9
+                       for a, b in zip(new, strengths))
+            strengths = new
+            if done:
+                break
+
+        ratings = []
+        for i in range(n):
+            information = strengths[i] / (strengths[i] + 1) ** 2
+            for j in range(n):
+                information += self._games[i][j] * strengths[i] * \
+                    strengths[j] / (strengths[i] + strengths[j]) ** 2
+            ratings.append((_BASE_RATING + _ELO_SCALE * math.log(strengths[i]),
+                            _Z_95 * _ELO_SCALE / math.sqrt(information)))
+        return ratings
+
+    def report(self) -> str:
+        """Return a table of every config's games, win rate and rating, from
+        the highest rated to the lowest.
+        """
+        ratings = self.ratings()
+        lines = [f'{"player":<12}{"games":>7}{"win rate":>20}{"elo":>14}']
+        for i in sorted(range(len(self.configs)),
+                        key=lambda index: -ratings[index][0]):
+            rate, low, high = self.win_rate(i)
+            rating, error = ratings[i]
+            lines.append(f'{config_name(self.configs[i]):<12}'
+                         f'{self.games(i):>7}'
+                         f'{rate:>8.1%} [{low:.1%}, {high:.1%}]'
+                         f'{rating:>8.0f} ± {error:.0f}')
+        return '\n'.join(lines)
+
+
+class Tournament:
+    """A tournament of headless two-player games between configurations of
+    computer players, played in parallel by a pool of worker processes.
+
+    Every game is played on a new board with its own seed, derived from
+    <seed> and the game's number, so a tournament gives the same results
+    however many processes play it.
+
+    === Public Attributes ===
+    configs:
+        The configurations of players that take part.
+    max_depth:
+        The max_depth of the board of every game.
+    num_turns:
+        The number of turns in every game.
+    seed:
+        The seed the seed of every game is derived from.
+    processes:
+        The number of worker processes, or None to use one per core.
+    standings:
+        The results of every game played so far.
+
+    === Representation Invariants ===
+    - len(configs) >= 2
+    """
+    # === Private Attributes ===
+    # _num_games:
+    #   The number of games scheduled so far.
+    # _byes:
+    #   The number of Swiss rounds each config has sat out.
+    configs: List[PlayerConfig]
+    max_depth: int
+    num_turns: int
+    seed: int
+    processes: Optional[int]
+    standings: Standings
+    _num_games: int
+    _byes: List[int]
+
+    def __init__(self, configs: List[PlayerConfig], max_depth: int = 3,
+                 num_turns: int = 5, seed: int = 0,
+                 processes: Optional[int] = None) -> None:
+        """Initialize a tournament between <configs> in which no game has
+        been played yet.
+
+        Precondition: len(configs) >= 2
+        """
+        self.configs = configs
+        self.max_depth = max_depth
+        self.num_turns = num_turns
+        self.seed = seed
+        self.processes = processes
+        self.standings = Standings(configs)
+        self._num_games = 0
+        self._byes = [0] * len(configs)
+
+    def _schedule(self, pairs: List[Tuple[int, int]],
+                  games_per_pair: int) -> List[_GameJob]:
+        """Return the jobs for <games_per_pair> games between each pair of
+        config indices in <pairs>, with the two configs taking turns to move
+        first.
+        """
+        jobs = []
+        for one, other in pairs:
+            for game in range(games_per_pair):
+                first, second = (one, other) if game % 2 == 0 \
+                    else (other, one)
+                number = self._num_games
+                self._num_games += 1
+                seed = random.Random(f'{self.seed}/{number}').getrandbits(32)
+                jobs.append((number, first, second, self.configs[first],
+                             self.configs[second], self.max_depth,
+                             self.num_turns, seed))
+        return jobs
+
+    def _run(self, pool: multiprocessing.pool.Pool,
+             jobs: List[_GameJob]) -> Iterator[GameResult]:
+        """Play <jobs> on <pool>, and record and yield each result as soon as
+        its game is over.
+        """
+        for result in pool.imap_unordered(_play, jobs):
+            self.standings.record(result)
+            yield result
+
+    def round_robin(self, games_per_pair: int = 2) -> Iterator[GameResult]:
+        """Play <games_per_pair> games between every pair of configs, and
+        yield each result as soon as its game is over.
+        """
+        n = len(self.configs)
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        jobs = self._schedule(pairs, games_per_pair)
+        with multiprocessing.Pool(self.processes) as pool:
+            yield from self._run(pool, jobs)
+
+    def swiss(self, rounds: int,
+              games_per_pair: int = 2) -> Iterator[GameResult]:
+        """Play <rounds> rounds of a Swiss-system tournament, and yield each
+        result as soon as its game is over.
+
+        In each round, every config plays <games_per_pair> games against a
+        config with as close a number of points as possible, preferring one it
+        has not played yet. With an odd number of configs, one config sits out
+        the round: the one with the fewest points among those that have sat
+        out the fewest rounds.
+        """
+        with multiprocessing.Pool(self.processes) as pool:
+            for _ in range(rounds):
+                jobs = self._schedule(self._swiss_pairs(), games_per_pair)
+                yield from self._run(pool, jobs)
+
+    def _swiss_pairs(self) -> List[Tuple[int, int]]:
+        """Return the pairs of config indices to play in the next Swiss round.
+        """
+        unpaired = sorted(range(len(self.configs)),
+                          key=lambda i: -self.standings.points(i))
+        if len(unpaired) % 2 == 1:
+            bye = min(reversed(unpaired), key=lambda i: self._byes[i])
+            self._byes[bye] += 1
+            unpaired.remove(bye)
+        pairs = []
+        while len(unpaired) > 1:
+            first = unpaired.pop(0)
+            opponent = unpaired[0]
+            for i in unpaired:
+                if self.standings.games(first, i) == 0:
+                    opponent = i
+                    break
+            unpaired.remove(opponent)
+            pairs.append((first, opponent))
+        return pairs
+
+
+def run_sample_tournament() -> None:
+    """Play a round robin between the players of create_auto_game and a
+    random player, printing the progress and then the standings.
+    """
+    tournament = Tournament([('random', 0), ('smart', 3), ('smart', 100)],
+                            num_turns=10)
+    for played, _ in enumerate(tournament.round_robin(50), 1):
+        if played % 25 == 0:
+            print(f'{played} games played')
+    print(tournament.standings.report())
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['run_sample_tournament'],
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'multiprocessing', 'block', 'engine', 'goal', 'player',
+            'settings'
+        ],
+        'max-attributes': 10
+    })
+
+    import doctest
+    doctest.testmod()
+
+    run_sample_tournament()
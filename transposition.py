@@ -0,0 +1,131 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the TranspositionTable class, a bounded cache of results
+about board states, keyed by Block.zobrist_hash.
+"""
+from typing import Any, List, Optional, Tuple
+
+
+class TranspositionTable:
+    """A fixed-size table of values about board states, keyed by their hash.
+
+    Every key maps to a single slot, so two keys can compete for the same
+    slot. A new entry replaces the one in its slot if that entry is for the
+    same key, was stored before the last call to new_generation, or was stored
+    with a depth no greater than the new entry's. This keeps the results that
+    were most expensive to compute, without letting old ones stay forever.
+
+    === Public Attributes ===
+    capacity:
+        The number of slots in this table.
+    hits:
+        The number of lookups that found a value.
+    misses:
+        The number of lookups that did not find a value.
+
+    === Representation Invariants ===
+    - capacity > 0
+    """
+    # === Private Attributes ===
+    # _slots:
+    #   For each slot, None or a tuple of the key, depth, generation and value
+    #   of the entry stored there.
+    # _generation:
+    #   The number of times new_generation has been called.
+    # _size:
+    #   The number of slots that are not None.
+    capacity: int
+    hits: int
+    misses: int
+    _slots: List[Optional[Tuple[int, int, int, Any]]]
+    _generation: int
+    _size: int
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        """Initialize an empty table with <capacity> slots.
+
+        Precondition: capacity > 0
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._slots = [None] * capacity
+        self._generation = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of entries in this table.
+        """
+        return self._size
+
+    def __contains__(self, key: int) -> bool:
+        """Return True iff this table has an entry for <key>.
+        """
+        entry = self._slots[key % self.capacity]
+        return entry is not None and entry[0] == key
+
+    def get(self, key: int, depth: int = 0) -> Optional[Any]:
+        """Return the value stored for <key>, or None if there is none or it
+        was stored with a depth less than <depth>.
+        """
+        entry = self._slots[key % self.capacity]
+        if entry is not None and entry[0] == key and entry[1] >= depth:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, value: Any, depth: int = 0) -> None:
+        """Store <value> for <key>, unless its slot holds a more valuable
+        entry for a different key.
+
+        <depth> is how much work <value> represents, e.g. the number of moves
+        searched to find it.
+        """
+        index = key % self.capacity
+        entry = self._slots[index]
+        if entry is None:
+            self._size += 1
+        elif entry[0] != key and entry[2] == self._generation \
+                and entry[1] > depth:
+            return
+        self._slots[index] = (key, depth, self._generation, value)
+
+    def new_generation(self) -> None:
+        """Mark every entry currently in this table as replaceable, e.g. when
+        a new move is about to be searched.
+        """
+        self._generation += 1
+
+    def clear(self) -> None:
+        """Remove every entry from this table.
+        """
+        self._slots = [None] * self.capacity
+        self._size = 0
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'max-attributes': 15
+    })
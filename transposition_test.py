@@ -0,0 +1,136 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+
+=== Module Description ===
+
+This file contains tests for transposition.py: storing and looking up
+entries, and which entry a slot keeps when two keys compete for it.
+"""
+import random
+
+import pytest
+
+from block import generate_board
+from goal import PerimeterGoal
+from player import MCTSPlayer, SmartPlayer
+from settings import COLOUR_LIST
+from transposition import TranspositionTable
+
+
+def test_store_and_get() -> None:
+    """Test that a stored value is found again, and a missing one is not.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'three')
+    assert 3 in table
+    assert 4 not in table
+    assert len(table) == 1
+    assert table.get(3) == 'three'
+    assert table.get(4) is None
+    assert (table.hits, table.misses) == (1, 1)
+
+
+def test_get_needs_enough_depth() -> None:
+    """Test that a value stored with too small a depth is not returned.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'three', 2)
+    assert table.get(3, 2) == 'three'
+    assert table.get(3, 3) is None
+
+
+def test_same_key_is_replaced() -> None:
+    """Test that storing a key again replaces its entry, whatever the depth.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'deep', 5)
+    table.store(3, 'shallow', 0)
+    assert table.get(3) == 'shallow'
+    assert len(table) == 1
+
+
+def test_collision_is_not_mistaken_for_key() -> None:
+    """Test that a key whose slot holds another key's entry is not found.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'three')
+    assert 11 not in table
+    assert table.get(11) is None
+
+
+def test_collision_keeps_deeper_entry() -> None:
+    """Test that an entry of this generation is only replaced by an entry
+    for another key with at least the same depth.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'three', 2)
+    table.store(11, 'eleven', 1)
+    assert table.get(3) == 'three'
+    assert 11 not in table
+
+    table.store(11, 'eleven', 2)
+    assert table.get(11) == 'eleven'
+    assert 3 not in table
+    assert len(table) == 1
+
+
+def test_new_generation_makes_entries_replaceable() -> None:
+    """Test that an entry from an earlier generation is replaced by any
+    entry for another key.
+    """
+    table = TranspositionTable(8)
+    table.store(3, 'three', 5)
+    table.new_generation()
+    assert table.get(3) == 'three'
+    table.store(11, 'eleven', 0)
+    assert table.get(11) == 'eleven'
+    assert 3 not in table
+
+
+def test_players_store_search_depth() -> None:
+    """Test that a player stores the score of the board it searches from
+    with the number of moves it looks ahead, in a new generation.
+    """
+    random.seed(0)
+    board = generate_board(3, 750)
+    goal = PerimeterGoal(COLOUR_LIST[0])
+    for player, depth in ((SmartPlayer(0, goal, 2), 1),
+                          (MCTSPlayer(0, goal, 0.01, horizon=3), 3)):
+        player.choose_move(board)
+        player.choose_move(board)
+        key = board.zobrist_hash()
+        assert player._scores.get(key, depth) == goal.score(board)
+        assert player._scores.get(key, depth + 1) is None
+
+
+def test_clear() -> None:
+    """Test that clearing a table removes every entry.
+    """
+    table = TranspositionTable(8)
+    for key in range(8):
+        table.store(key, key)
+    assert len(table) == 8
+    table.clear()
+    assert len(table) == 0
+    assert all(key not in table for key in range(8))
+
+
+if __name__ == '__main__':
+    pytest.main(['transposition_test.py'])